@@ -0,0 +1,379 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run --sizes 1000 100000 --seed 7 --output bench_results.json
+    python -m benchmarks.run --cases parse summary --sizes 1000000 --compare old.json
+
+Every case times one operation on a synthetic fleet (benchmarks/fleet.py) and
+reports best/median wall time over --repeat runs. Each case runs in a fresh
+interpreter, so its peak RSS is not inflated by the cases before it; on Linux
+the peak is reset after setup and covers the timed runs only. Results are written as JSON
+together with the commit and library versions so runs can be compared across
+commits; --compare prints the ratio against an earlier results file.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from .fleet import write_fleet_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CASES = {}
+# Cases whose cost does not depend on fleet size run once, reported with rows=0
+UNSIZED = set()
+
+# Cases that go through the JSON-backed Django registry or Qt widgets become
+# impractical beyond these sizes; larger requested sizes are skipped for them.
+DEFAULT_LIMITS = {
+    'ingest': 1_000_000,
+    'history': 1_000_000,
+    'history_warm': 1_000_000,
+    'compare': 1_000_000,
+    'compare_warm': 1_000_000,
+    'desktop_refresh': 1_000_000,
+    'pdf': 1_000_000,
+}
+
+
+def case(name, sized=True):
+    def register(func):
+        CASES[name] = func
+        if not sized:
+            UNSIZED.add(name)
+        return func
+    return register
+
+
+class Workspace:
+    """Generated CSVs (one per size/seed) and lazily initialised Django/Qt state."""
+
+    def __init__(self, seed, data_dir):
+        self.seed = seed
+        self.data_dir = data_dir
+        self._django_ready = False
+        self._qt_app = None
+
+    def csv_path(self, rows):
+        path = os.path.join(self.data_dir, f'fleet-{rows}-seed{self.seed}.csv')
+        if not os.path.exists(path):
+            write_fleet_csv(path, rows, self.seed)
+        return path
+
+    def frame(self, rows):
+        from equipment.parsing import read_equipment_csv
+        return read_equipment_csv(self.csv_path(rows))[0]
+
+    def django_client(self):
+        if not self._django_ready:
+            os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chem_backend.settings')
+            import django
+            django.setup()
+            from django.conf import settings
+            from django.test.utils import setup_databases, setup_test_environment
+            setup_test_environment()
+            # Test database (in-memory SQLite); unmigrated apps are created by syncdb
+            setup_databases(verbosity=0, interactive=False)
+            settings.ALLOWED_HOSTS = ['*']
+            settings.DATASET_COLUMNS_DIR = os.path.join(self.data_dir, 'dataset_columns')
+            self._django_ready = True
+        from django.test import Client
+        return Client()
+
+    def upload(self, client, rows):
+        with open(self.csv_path(rows), 'rb') as f:
+            payload = io.BytesIO(f.read())
+        payload.name = f'fleet-{rows}.csv'
+        response = client.post('/api/upload/', {'file': payload})
+        assert response.status_code == 201, response.content[:500]
+        return response.json()
+
+    def qt_home(self):
+        """An empty home directory for the terminal, so runs neither read nor overwrite the operator's session."""
+        home = os.path.join(self.data_dir, 'home')
+        shutil.rmtree(home, ignore_errors=True)
+        os.makedirs(home)
+        return home
+
+    def qt_window(self):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication
+        import desktop_app
+        state_dir = os.path.join(self.qt_home(), '.equipiq')
+        desktop_app.PENDING_UPLOADS_PATH = os.path.join(state_dir, 'pending_uploads.json')
+        desktop_app.LAST_SESSION_PATH = os.path.join(state_dir, 'last_session.json')
+        if self._qt_app is None:
+            self._qt_app = QApplication.instance() or QApplication([])
+        window = desktop_app.EquipmentVisualizer()
+        window.history_timer.stop()
+        return window
+
+
+@case('parse_default')
+def bench_parse_default(ws, rows):
+    path = ws.csv_path(rows)
+    return lambda: pd.read_csv(path)
+
+
+@case('parse')
+def bench_parse(ws, rows):
+    from equipment.parsing import read_equipment_csv
+    path = ws.csv_path(rows)
+    return lambda: read_equipment_csv(path)
+
+
+@case('summary')
+def bench_summary(ws, rows):
+    from equipment.analytics import build_summary
+    df = ws.frame(rows)
+    return lambda: build_summary(df)
+
+
+@case('ingest')
+def bench_ingest(ws, rows):
+    client = ws.django_client()
+    ws.csv_path(rows)
+    return lambda: ws.upload(client, rows)
+
+
+def _get(client, path, warm):
+    def run():
+        if not warm:
+            from equipment.cache import dataset_cache
+            dataset_cache().clear()  # measure the computation, not the cached response
+        return client.get(path).json()
+    if warm:
+        run()  # fill the cache before timing
+    return run
+
+
+@case('history')
+def bench_history(ws, rows, warm=False):
+    client = ws.django_client()
+    ws.upload(client, rows)
+    return _get(client, '/api/history/', warm)
+
+
+@case('history_warm')
+def bench_history_warm(ws, rows):
+    return bench_history(ws, rows, warm=True)
+
+
+@case('compare')
+def bench_compare(ws, rows, warm=False):
+    client = ws.django_client()
+    ids = ','.join(str(ws.upload(client, rows)['id']) for _ in range(2))
+    return _get(client, f'/api/compare/?ids={ids}', warm)
+
+
+@case('compare_warm')
+def bench_compare_warm(ws, rows):
+    return bench_compare(ws, rows, warm=True)
+
+
+def _load_window(ws, rows):
+    import desktop_app
+    from equipment.analytics import build_summary
+    df = ws.frame(rows)
+    window = ws.qt_window()
+    window.workspace = desktop_app.DatasetWorkspace(os.path.join(ws.data_dir, 'workspace'))
+    window.set_current_data({"id": "bench", "filename": f"fleet-{rows}.csv", "summary": build_summary(df)}, df)
+    return window
+
+
+@case('desktop_refresh')
+def bench_desktop_refresh(ws, rows):
+    window = _load_window(ws, rows)
+
+    def refresh():
+        window.table_query = None  # rebuild the row set every run, as a dataset switch or new search does
+        window.refresh_ui()
+    return refresh
+
+
+@case('pdf')
+def bench_pdf(ws, rows):
+    window = _load_window(ws, rows)
+    path = os.path.join(ws.data_dir, 'bench-report.pdf')
+    return lambda: window.write_pdf_report(path)
+
+
+@case('desktop_startup', sized=False)
+def bench_desktop_startup(ws, rows):
+    # Fresh interpreter each run: wall time from launch until the first paint
+    # has been handled and the probe quits the event loop.
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', EQUIPIQ_STARTUP_PROBE='1')
+    env['HOME'] = env['USERPROFILE'] = ws.qt_home()  # expanduser() reads USERPROFILE on Windows
+    cmd = [sys.executable, os.path.join(ROOT, 'desktop_app.py')]
+    return lambda: subprocess.run(cmd, env=env, cwd=ROOT, check=True,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _reset_peak_rss():
+    """Start a new peak-RSS window; only Linux supports this (VmHWM via clear_refs)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_mb(field):
+    """A memory figure from /proc/self/status (Linux only), else None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return round(int(line.split()[1]) * 1024 / 1e6, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6, 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(ws, name, rows, repeat):
+    func = CASES[name](ws, rows)
+    gc.collect()
+    # Without a reset (non-Linux) the peak also covers the case's setup
+    peak_reset = _reset_peak_rss()
+    rss_before = _proc_status_mb('VmRSS')
+    timings = []
+    for _ in range(repeat):
+        gc.collect()  # garbage from the previous run (e.g. test client cycles) would count towards the peak
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    peak_rss = _peak_rss_mb()
+    return {
+        "case": name,
+        "rows": rows,
+        "seconds": [round(t, 6) for t in timings],
+        "best": round(min(timings), 6),
+        "median": round(statistics.median(timings), 6),
+        "rowsPerSecond": round(rows / min(timings)) if min(timings) else None,
+        "peakRssMb": peak_rss,
+        "peakRssIncludesSetup": not peak_reset,
+        # Growth over the resident set after setup: what the operation itself needed
+        "peakRssDeltaMb": round(max(peak_rss - rss_before, 0), 1) if peak_reset and rss_before is not None else None,
+    }
+
+
+def run_isolated(args, name, rows):
+    """run_case() in a fresh interpreter; returns its result, or raises ImportError if the case was skipped."""
+    cmd = [sys.executable, '-m', 'benchmarks.run', '--single-case', name, str(rows), '--seed', str(args.seed),
+           '--repeat', str(args.repeat), '--data-dir', args.data_dir]
+    output = subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.PIPE, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    if 'skipped' in result:
+        raise ImportError(result['skipped'])
+    return result
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['rows']): r for r in json.load(f)['results']}
+    print(f"\n{'case':<18}{'rows':>12}{'before s':>12}{'after s':>12}{'ratio':>9}")
+    for r in results:
+        old = baseline.get((r['case'], r['rows']))
+        if old and old['best']:
+            print(f"{r['case']:<18}{r['rows']:>12}{old['best']:>12.4f}{r['best']:>12.4f}{r['best'] / old['best']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EquipIQ benchmark suite")
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', help="Where generated CSVs are cached (default: a temp dir)")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--no-limits', action='store_true', help="Run every case at every size")
+    parser.add_argument('--single-case', nargs=2, metavar=('CASE', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    args.data_dir = args.data_dir or tempfile.mkdtemp(prefix='equipiq-bench-')
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    if args.single_case:
+        # Child of run_isolated(): one case, result as the last line of stdout
+        name, rows = args.single_case[0], int(args.single_case[1])
+        try:
+            result = run_case(Workspace(args.seed, args.data_dir), name, rows, args.repeat)
+        except ImportError as e:
+            result = {"skipped": str(e)}
+        print(json.dumps(result))
+        return
+
+    results = []
+    plan = [(0, name) for name in args.cases if name in UNSIZED]
+    plan += [(rows, name) for rows in args.sizes for name in args.cases if name not in UNSIZED]
+    for rows, name in plan:
+        limit = DEFAULT_LIMITS.get(name)
+        if limit and rows > limit and not args.no_limits:
+            print(f"skip  {name:<18}{rows:>12} rows (limit {limit}, use --no-limits)")
+            continue
+        try:
+            result = run_isolated(args, name, rows)
+        except ImportError as e:
+            print(f"skip  {name:<18}{rows:>12} rows ({e})")
+            continue
+        results.append(result)
+        print(f"ok    {name:<18}{rows:>12} rows  best {result['best']:.4f}s  median {result['median']:.4f}s")
+
+    import numpy
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": numpy.__version__,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +21,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'equipment.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -68,3 +70,42 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True # Development only
+
+# Resumable chunked uploads (see equipment/views.py ChunkedUpload*)
+CHUNKED_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'equipiq-uploads')
+CHUNKED_UPLOAD_MAX_SIZE = 16 * 1024 ** 3  # data.part is preallocated to the declared size
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_SECONDS = 24 * 60 * 60
+
+# Request instrumentation (equipment/middleware.py); metrics served at /api/metrics/
+METRICS_TRACE_MEMORY = False  # tracemalloc-based per-request peak memory; slows allocation-heavy requests
+METRICS_PROFILING_ENABLED = False  # honour the X-Profile request header; never enable on a reachable server
+METRICS_PROFILE_DIR = BASE_DIR / 'profiles'
+METRICS_PROFILE_KEEP = 50  # older profiles are deleted
+
+# Dataset payload cache (equipment/cache.py). A per-process LRU bounded by both
+# MAX_ENTRIES and MAX_BYTES of pickled values; history listings are checked against
+# the database on every request, so other processes' uploads and prunes are seen.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'datasets': {
+        'BACKEND': 'equipment.cache.BoundedLocMemCache',
+        'LOCATION': 'equipiq-datasets',
+        'TIMEOUT': None,  # entries are invalidated explicitly on upload and prune
+        'OPTIONS': {'MAX_ENTRIES': 512, 'CULL_FREQUENCY': 8, 'MAX_BYTES': 512 * 1024 * 1024},
+    },
+}
+DATASET_CACHE_MAX_ENTRY_BYTES = 64 * 1024 * 1024  # larger payloads are served uncached
+DATASET_PAGE_SIZE = 1000
+DATASET_MAX_PAGE_SIZE = 10000
+DATASET_COLUMNS_DIR = BASE_DIR / 'dataset_columns'  # columnar sidecars read by /api/compare/
+COMPARE_MAX_LIMIT = 1000  # most assets /api/compare/ returns
+
+# Sketch-mode uploads (POST /api/upload/?mode=sketch, equipment/sketches.py)
+SKETCH_JOB_DIR = os.path.join(tempfile.gettempdir(), 'equipiq-sketch-jobs')
+SKETCH_TIME_BUDGET_SECONDS = 2.0  # preliminary statistics are returned after roughly this long
+SKETCH_BLOCK_BYTES = 4 * 1024 * 1024
+SKETCH_REFINE_WORKERS = 1  # background exact ingestions run one at a time
+SKETCH_JOB_EXPIRY_SECONDS = 24 * 60 * 60
@@ -1,22 +1,466 @@
 
+import time
+_MODULE_START = time.perf_counter()
+
 import sys
 import os
-import requests
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_pdf import PdfPages
+import json
+import hashlib
+import importlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QPushButton, QFileDialog, QTableWidget, 
-                             QTableWidgetItem, QLabel, QFrame, QMessageBox, 
-                             QStackedWidget, QLineEdit, QSlider, QGridLayout, QScrollArea)
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QFont, QIcon, QColor, QPalette
+                             QHBoxLayout, QPushButton, QFileDialog, QTableView, 
+                             QAbstractItemView, QHeaderView, QLabel, QFrame, QMessageBox, 
+                             QStackedWidget, QLineEdit, QSlider, QGridLayout, QScrollArea, QShortcut)
+from PyQt5.QtCore import Qt, QTimer, QSize, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QFont, QIcon, QColor, QPalette, QKeySequence
+from equipment.metrics import STAGE_SECONDS, timed
+
+class _LazyModule:
+    """Defers a heavy import until an attribute is first used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# pandas, numpy, matplotlib and requests account for most of the cold start;
+# none of them is needed before the first dataset or network call.
+pd = _LazyModule("pandas")
+np = _LazyModule("numpy")
+plt = _LazyModule("matplotlib.pyplot")
+requests = _LazyModule("requests")
 
 # Backend API Configuration
 BASE_URL = "http://127.0.0.1:8000/api"
 
+# Files above this size go through the resumable chunked protocol
+CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+CHUNK_SIZE = 8 * 1024 * 1024
+CHUNK_WORKERS = 4
+CHUNK_RETRIES = 3
+PENDING_UPLOADS_PATH = os.path.join(os.path.expanduser("~"), ".equipiq", "pending_uploads.json")
+# Summary of the last dataset shown, painted immediately on the next launch
+LAST_SESSION_PATH = os.path.join(os.path.expanduser("~"), ".equipiq", "last_session.json")
+# Columnar, memory-mapped copies of every dataset opened in the terminal
+WORKSPACE_DIR = os.path.join(os.path.expanduser("~"), ".equipiq", "workspace")
+WORKSPACE_MAX_DATASETS = 20
+METRIC_COLUMNS = ('Flowrate', 'Pressure', 'Temperature')
+SCATTER_MAX_POINTS = 5_000
+
+class ChunkedUploader:
+    """Client side of /api/uploads/: parallel chunk PUTs, resumable across restarts."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        # A pending upload is only reused for the exact same file contents on disk
+        self.fingerprint = f"{self.path}|{self.size}|{int(stat.st_mtime)}"
+
+    def _load_pending(self):
+        try:
+            with open(PENDING_UPLOADS_PATH) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_pending(self, upload_id):
+        pending = self._load_pending()
+        if upload_id:
+            pending[self.fingerprint] = upload_id
+        else:
+            pending.pop(self.fingerprint, None)
+        os.makedirs(os.path.dirname(PENDING_UPLOADS_PATH), exist_ok=True)
+        with open(PENDING_UPLOADS_PATH, 'w') as f:
+            json.dump(pending, f)
+
+    def _resume_or_start(self):
+        upload_id = self._load_pending().get(self.fingerprint)
+        if upload_id:
+            response = requests.get(f"{BASE_URL}/uploads/{upload_id}/", timeout=10)
+            if response.status_code == 200:
+                return response.json()
+        response = requests.post(f"{BASE_URL}/uploads/", json={
+            "filename": os.path.basename(self.path), "size": self.size, "chunkSize": CHUNK_SIZE
+        }, timeout=10)
+        response.raise_for_status()
+        state = response.json()
+        self._save_pending(state['uploadId'])
+        return state
+
+    def _send_chunk(self, upload_id, chunk_size, index):
+        with open(self.path, 'rb') as f:
+            f.seek(index * chunk_size)
+            payload = f.read(chunk_size)
+        checksum = hashlib.sha256(payload).hexdigest()
+        for attempt in range(CHUNK_RETRIES):
+            try:
+                response = requests.put(f"{BASE_URL}/uploads/{upload_id}/chunks/{index}/", data=payload,
+                                        headers={"Content-Type": "application/octet-stream", "X-Chunk-Sha256": checksum},
+                                        timeout=60)
+                if response.status_code == 200:
+                    return
+            except requests.RequestException:
+                if attempt == CHUNK_RETRIES - 1:
+                    raise
+        raise RuntimeError(f"Chunk {index} rejected: {response.text}")
+
+    def upload(self, progress=None):
+        """
+        Send every chunk the server is missing, then commit; returns the commit response.
+
+        `progress(chunks_received, total_chunks)` is called from this thread
+        after each chunk lands; received == total means the commit has started.
+        """
+        state = self._resume_or_start()
+        upload_id, chunk_size, total = state['uploadId'], state['chunkSize'], state['totalChunks']
+        received = set(state['receivedChunks'])
+        missing = [i for i in range(total) if i not in received]
+        if progress:
+            progress(len(received), total)
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as pool:
+            futures = [pool.submit(self._send_chunk, upload_id, chunk_size, i) for i in missing]
+            for done, future in enumerate(as_completed(futures), len(received) + 1):
+                # result() re-raises the first failure; finished chunks stay recorded server-side for resume
+                future.result()
+                if progress:
+                    progress(done, total)
+
+        response = requests.post(f"{BASE_URL}/uploads/{upload_id}/commit/", timeout=600)
+        if response.status_code != 409 and response.status_code < 500:
+            self._save_pending(None)
+        return response
+
+
+class ChunkedUploadWorker(QThread):
+    """Runs a ChunkedUploader off the GUI thread and reports back through queued signals."""
+
+    progress = pyqtSignal(int, int)  # chunks received by the server, total chunks
+    succeeded = pyqtSignal(object)   # the stored dataset (decoded commit response)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def run(self):
+        try:
+            response = ChunkedUploader(self.path).upload(progress=self.progress.emit)
+            if response.status_code != 201:
+                self.failed.emit(f"Commit failed ({response.status_code})")
+                return
+            # Decoding a large dataset is slow too, so it happens here rather than in the slot
+            self.succeeded.emit(response.json())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def _mapped_rss_by_file():
+    """Resident bytes per mapped file, from /proc/self/smaps (Linux only)."""
+    usage = {}
+    try:
+        with open('/proc/self/smaps') as f:
+            current = None
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == 'Rss:':
+                    if current:
+                        usage[current] = usage.get(current, 0) + int(parts[1]) * 1024
+                elif '-' in parts[0] and not parts[0].endswith(':'):
+                    current = parts[5] if len(parts) > 5 else None
+    except OSError:
+        return None
+    return usage
+
+class MappedDataset:
+    """
+    One dataset stored column by column on disk and opened with np.load(mmap_mode='r').
+
+    Metrics are float64 .npy files, Type is int32 codes plus a category list,
+    and Equipment Name is a UTF-8 blob with an offsets array. Nothing is
+    copied onto the Python heap: pages are faulted in by the OS on access
+    and stay in the page cache when the terminal switches datasets.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.columns = {col: np.load(os.path.join(path, f'{col}.npy'), mmap_mode='r') for col in METRIC_COLUMNS}
+        self.type_codes = np.load(os.path.join(path, 'type_codes.npy'), mmap_mode='r')
+        self.name_offsets = np.load(os.path.join(path, 'name_offsets.npy'), mmap_mode='r')
+        self.name_blob = np.load(os.path.join(path, 'name_blob.npy'), mmap_mode='r')
+        self.types = self.meta['types']
+        self._search_index = None
+
+    @staticmethod
+    def write(path, df):
+        """Persist a DataFrame in the documented schema as a dataset directory."""
+        tmp_path = path + '.tmp'
+        os.makedirs(tmp_path, exist_ok=True)
+        for col in METRIC_COLUMNS:
+            np.save(os.path.join(tmp_path, f'{col}.npy'), pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64'))
+        codes, types = pd.factorize(df['Type'].astype(str))
+        np.save(os.path.join(tmp_path, 'type_codes.npy'), codes.astype('int32'))
+        encoded = [str(name).encode('utf-8') for name in df['Equipment Name']]
+        offsets = np.zeros(len(encoded) + 1, dtype='int64')
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        np.save(os.path.join(tmp_path, 'name_offsets.npy'), offsets)
+        np.save(os.path.join(tmp_path, 'name_blob.npy'), np.frombuffer(b''.join(encoded), dtype='uint8'))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({"rows": len(df), "types": [str(t) for t in types]}, f)
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def name(self, i):
+        return bytes(self.name_blob[self.name_offsets[i]:self.name_offsets[i + 1]]).decode('utf-8')
+
+    def type_of(self, i):
+        code = self.type_codes[i]
+        return self.types[code] if code >= 0 else ''
+
+    def search(self, text):
+        """Row indices whose name or Type contains `text` (case-insensitive)."""
+        if not text:
+            return np.arange(len(self))
+        text = text.lower()
+        type_hits = [code for code, t in enumerate(self.types) if text in t.lower()]
+        return np.flatnonzero(self._name_matches(text) | np.isin(self.type_codes, type_hits))
+
+    def _lowered_names(self):
+        """
+        The name blob lower-cased, built on first search: A-Z are folded in one
+        vectorised pass, and only names with non-ASCII bytes go through
+        str.lower(). The few whose lower-case form changes byte length are kept
+        aside as bytes, keyed by row.
+        """
+        if self._search_index is None:
+            blob, offsets = np.asarray(self.name_blob), np.asarray(self.name_offsets)
+            upper = (blob >= ord('A')) & (blob <= ord('Z'))
+            lowered = np.where(upper, blob + 32, blob).astype('uint8')
+            irregular = {}
+            non_ascii = np.concatenate([[0], np.cumsum(blob >= 0x80)])
+            for i in np.flatnonzero(non_ascii[offsets[1:]] > non_ascii[offsets[:-1]]):
+                name = self.name(i).lower().encode('utf-8')
+                if len(name) == offsets[i + 1] - offsets[i]:
+                    lowered[offsets[i]:offsets[i + 1]] = np.frombuffer(name, dtype='uint8')
+                else:
+                    irregular[int(i)] = name
+            self._search_index = (lowered, irregular)
+        return self._search_index
+
+    def _name_matches(self, text):
+        """Boolean mask of rows whose lower-cased name contains `text`, found by scanning the blob."""
+        blob, irregular = self._lowered_names()
+        offsets = self.name_offsets
+        needle = np.frombuffer(text.encode('utf-8'), dtype='uint8')
+        mask = np.zeros(len(self), dtype=bool)
+        last_start = len(blob) - len(needle)
+        if last_start >= 0:
+            # Candidate start positions, narrowed one needle byte at a time
+            starts = np.flatnonzero(blob[:last_start + 1] == needle[0])
+            for j in range(1, len(needle)):
+                starts = starts[blob[starts + j] == needle[j]]
+            rows = np.searchsorted(offsets, starts, side='right') - 1
+            within = starts + len(needle) <= offsets[rows + 1]  # no match across a name boundary
+            mask[rows[within]] = True
+        for i, name in irregular.items():
+            mask[i] = needle.tobytes() in name
+        return mask
+
+    def frame(self):
+        return pd.DataFrame({
+            'Equipment Name': [self.name(i) for i in range(len(self))],
+            'Type': pd.Categorical.from_codes(np.asarray(self.type_codes), self.types),
+            **{col: self.columns[col] for col in METRIC_COLUMNS},
+        })
+
+    def memory_usage(self, rss_by_file=None):
+        """(resident bytes, mapped bytes) for this dataset's files."""
+        mapped = sum(os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path))
+        if rss_by_file is None:
+            return None, mapped
+        resident = sum(size for file, size in rss_by_file.items() if file.startswith(self.path + os.sep))
+        return resident, mapped
+
+class DatasetView:
+    """
+    The active dataset as the terminal shows it: a MappedDataset whose metric
+    columns the live simulation may replace with drifted heap arrays. The
+    drift lives only in this view, so the workspace copy stays mapped and
+    selecting the dataset again starts from its stored values.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.columns = dict(dataset.columns)
+
+    def __getattr__(self, name):
+        return getattr(self.dataset, name)
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def frame(self):
+        df = self.dataset.frame()
+        for col in METRIC_COLUMNS:
+            df[col] = self.columns[col]
+        return df
+
+class DatasetWorkspace:
+    """Keeps every dataset the terminal has opened as a MappedDataset, keyed by identity."""
+
+    def __init__(self, root=WORKSPACE_DIR):
+        self.root = root
+        self.open_datasets = {}
+
+    @staticmethod
+    def key_for(item):
+        # Upload responses carry no timestamp, so identity is id + filename + row count
+        ident = f"{item['id']}|{item['filename']}|{item['summary']['totalCount']}"
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()[:16]
+
+    def contains(self, item):
+        key = self.key_for(item)
+        return key in self.open_datasets or os.path.exists(os.path.join(self.root, key, 'meta.json'))
+
+    def add(self, item, df=None):
+        """Store `item` (records in item['data'], or `df`) unless it is already present."""
+        key = self.key_for(item)
+        path = os.path.join(self.root, key)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            if df is None:
+                df = pd.DataFrame.from_records(item['data'], columns=['Equipment Name', 'Type', *METRIC_COLUMNS])
+            os.makedirs(self.root, exist_ok=True)
+            MappedDataset.write(path, df)
+            self.prune()
+        return self.open(item)
+
+    def open(self, item):
+        key = self.key_for(item)
+        path = os.path.join(self.root, key)
+        if key not in self.open_datasets:
+            self.open_datasets[key] = MappedDataset(path)
+        os.utime(path)  # prune() evicts the least recently opened datasets
+        return self.open_datasets[key]
+
+    def prune(self):
+        entries = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[WORKSPACE_MAX_DATASETS:]:
+            self.open_datasets.pop(os.path.basename(path), None)
+            shutil.rmtree(path, ignore_errors=True)
+
+    def memory_report(self):
+        rss = _mapped_rss_by_file()
+        return {key: ds.memory_usage(rss) for key, ds in self.open_datasets.items()}
+
+class DatasetTableModel(QAbstractTableModel):
+    """
+    Read-only rows `rows` of a DatasetView for the Monitors table.
+
+    data() reads the mapped columns for the cells Qt asks about, which are
+    only the visible ones, so a refresh costs the same for 50 rows or 5M.
+    """
+
+    COLUMNS = ('Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature', 'Status')
+    CRITICAL_COLOR = QColor("#f43f5e")
+    STABLE_COLOR = QColor("#2563eb")
+    DEFAULT_COLOR = QColor("#a1a1aa")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dataset = None
+        self.rows = ()
+        self.threshold = 0
+        self.critical_font = QFont("Inter", 11, QFont.Black)
+
+    def set_rows(self, dataset, rows, threshold):
+        self.beginResetModel()
+        self.dataset, self.rows, self.threshold = dataset, rows, threshold
+        self.endResetModel()
+
+    def refresh_values(self, threshold):
+        """Repaint the metric and Status cells: the limit moves and simulation replaces the metric columns."""
+        self.threshold = threshold
+        if len(self.rows):
+            self.dataChanged.emit(self.index(0, 2), self.index(len(self.rows) - 1, 5))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        return self.COLUMNS[section] if orientation == Qt.Horizontal else str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role not in (Qt.DisplayRole, Qt.ForegroundRole, Qt.FontRole):
+            return None
+        row, col = int(self.rows[index.row()]), self.COLUMNS[index.column()]
+        critical = float(self.dataset.columns['Pressure'][row]) > self.threshold
+        if role == Qt.DisplayRole:
+            if col == 'Equipment Name':
+                return self.dataset.name(row)
+            if col == 'Type':
+                return self.dataset.type_of(row)
+            if col == 'Status':
+                return "CRITICAL" if critical else "STABLE"
+            return str(float(self.dataset.columns[col][row]))
+        if col == 'Status':
+            return (self.CRITICAL_COLOR if critical else self.STABLE_COLOR) if role == Qt.ForegroundRole else None
+        if col == 'Pressure' and critical:
+            return self.CRITICAL_COLOR if role == Qt.ForegroundRole else self.critical_font
+        return self.DEFAULT_COLOR if role == Qt.ForegroundRole else None
+
+
+class RefreshScheduler:
+    """
+    Coalesces refresh requests into at most one repaint per frame.
+
+    Callers mark the parts that changed; the first mark arms a single-shot
+    timer and every further mark before it fires only widens the dirty set.
+    A slider drag or a burst of keystrokes therefore costs one repaint of
+    the affected parts instead of one full redraw per event.
+    """
+    CARDS = "cards"
+    TABLE = "table"
+    PIE = "pie"
+    SCATTER = "scatter"
+    ALL = frozenset((CARDS, TABLE, PIE, SCATTER))
+
+    def __init__(self, callback, interval_ms=16):
+        self.callback = callback
+        self.dirty = set()
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def mark(self, parts):
+        self.dirty.update(parts)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        if not self.dirty:
+            return
+        parts, self.dirty = frozenset(self.dirty), set()
+        self.callback(parts)
+
 class Theme:
     DARK = {
         "bg_main": "#09090b",
@@ -143,9 +587,13 @@ class EquipmentVisualizer(QMainWindow):
         self.theme = Theme.DARK
         self.current_data = None
         self.active_id = None
+        self.workspace = DatasetWorkspace()
         self.pressure_threshold = 40
         self.is_simulating = False
         self.is_offline_mode = False
+        self.upload_worker = None
+        self.first_paint_pending = True
+        self.refresh_scheduler = RefreshScheduler(self.refresh_ui)
         
         self.initUI()
         
@@ -158,6 +606,17 @@ class EquipmentVisualizer(QMainWindow):
         
         QTimer.singleShot(500, self.fetch_history)
 
+        # Frame-time overlay (F12 or EQUIPIQ_PERF_OVERLAY=1)
+        self.perf_overlay = QLabel(self)
+        self.perf_overlay.setStyleSheet("background-color: rgba(9, 9, 11, 220); color: #10b981; font-family: monospace; font-size: 10px; padding: 10px; border: 1px solid #27272a; border-radius: 8px;")
+        self.perf_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.perf_overlay.hide()
+        self.perf_timer = QTimer()
+        self.perf_timer.timeout.connect(self.update_perf_overlay)
+        QShortcut(QKeySequence("F12"), self, activated=self.toggle_perf_overlay)
+        if os.environ.get("EQUIPIQ_PERF_OVERLAY") == "1":
+            self.toggle_perf_overlay()
+
     def initUI(self):
         main_widget = QWidget()
         main_widget.setStyleSheet(f"background-color: {self.theme['bg_main']};")
@@ -224,8 +683,81 @@ class EquipmentVisualizer(QMainWindow):
         # 2. MAIN CONTENT
         self.stack = QStackedWidget()
         
-        # Dashboard Page
+        # Dashboard and Monitors are built on first use (see ensure_page)
         self.page_dash = QWidget()
+        self.page_monitors = QWidget()
+        self.built_pages = set()
+        self.fig_pie = None
+
+        # Ingestion Page
+        self.page_ingest = QWidget()
+        ing_layout = QVBoxLayout(self.page_ingest)
+        ing_layout.setContentsMargins(150, 150, 150, 150)
+        upload_area = QFrame()
+        upload_area.setStyleSheet(f"border: 5px dashed {self.theme['border']}; border-radius: 70px; background-color: {self.theme['bg_card']};")
+        upload_vbox = QVBoxLayout(upload_area)
+        upload_vbox.setAlignment(Qt.AlignCenter)
+        up_title = QLabel("Push Data Stream")
+        up_title.setStyleSheet("color: white; font-size: 42px; font-weight: 900; margin-bottom: 10px;")
+        up_desc = QLabel("Neural analytic mapping for CSV asset matrices.")
+        up_desc.setStyleSheet(f"color: {self.theme['text_muted']}; font-size: 16px; margin-bottom: 50px;")
+        
+        self.btn_browse = QPushButton("INITIALIZE DECRYPTION")
+        self.btn_browse.setFixedSize(340, 70)
+        self.btn_browse.setStyleSheet(f"QPushButton {{ background-color: {self.theme['accent']}; color: white; border-radius: 24px; font-weight: 900; font-size: 13px; tracking: 1px; }} QPushButton:hover {{ background-color: #1d4ed8; }} QPushButton:disabled {{ background-color: {self.theme['border']}; }}")
+        self.btn_browse.clicked.connect(self.upload_file)
+        
+        upload_vbox.addWidget(up_title, 0, Qt.AlignCenter)
+        upload_vbox.addWidget(up_desc, 0, Qt.AlignCenter)
+        upload_vbox.addWidget(self.btn_browse, 0, Qt.AlignCenter)
+        ing_layout.addWidget(upload_area)
+
+        self.stack.addWidget(self.page_dash)
+        self.stack.addWidget(self.page_monitors)
+        self.stack.addWidget(self.page_ingest)
+        
+        layout.addWidget(sidebar)
+        layout.addWidget(self.stack)
+        if not self.restore_cached_session():
+            self.set_tab(2)
+
+    def toggle_perf_overlay(self):
+        if self.perf_overlay.isVisible():
+            self.perf_timer.stop()
+            self.perf_overlay.hide()
+        else:
+            self.update_perf_overlay()
+            self.perf_overlay.show()
+            self.perf_overlay.raise_()
+            self.perf_timer.start(500)
+
+    def update_perf_overlay(self):
+        lines = ["STAGE            LAST ms   AVG ms     N"]
+        for (name,), (last, mean, count) in sorted(STAGE_SECONDS.snapshot().items()):
+            lines.append(f"{name:<16}{last * 1000:>8.1f}{mean * 1000:>9.1f}{count:>6}")
+        if len(lines) == 1:
+            lines.append("no samples yet")
+        report = self.workspace.memory_report()
+        if report:
+            lines.append("")
+            lines.append("DATASET            RSS MB  MAPPED MB")
+            for key, (resident, mapped) in sorted(report.items()):
+                rss = f"{resident / 1e6:>8.1f}" if resident is not None else f"{'n/a':>8}"
+                lines.append(f"{key:<16}{rss}{mapped / 1e6:>11.1f}")
+        self.perf_overlay.setText("\n".join(lines))
+        self.perf_overlay.adjustSize()
+        self.perf_overlay.move(self.width() - self.perf_overlay.width() - 20, 20)
+
+    def ensure_page(self, index):
+        if index in self.built_pages:
+            return
+        self.built_pages.add(index)
+        if index == 0:
+            self.build_dashboard_page()
+        elif index == 1:
+            self.build_monitors_page()
+
+    def build_dashboard_page(self):
         dash_layout = QVBoxLayout(self.page_dash)
         dash_layout.setContentsMargins(50, 50, 50, 50)
         dash_layout.setSpacing(35)
@@ -234,6 +766,9 @@ class EquipmentVisualizer(QMainWindow):
         dash_title = QLabel("Dashboard")
         dash_title.setStyleSheet("color: white; font-size: 48px; font-weight: 900; letter-spacing: -2px;")
         dash_header.addWidget(dash_title)
+        self.dash_source = QLabel("")
+        self.dash_source.setStyleSheet(f"color: {self.theme['text_muted']}; font-size: 11px; font-weight: 900; letter-spacing: 1px; margin-left: 20px; margin-top: 22px;")
+        dash_header.addWidget(self.dash_source)
         
         self.btn_pdf_dash = QPushButton("DOWNLOAD PDF AUDIT")
         self.btn_pdf_dash.setFixedSize(240, 55)
@@ -257,15 +792,11 @@ class EquipmentVisualizer(QMainWindow):
         charts_row = QHBoxLayout()
         pie_frame = QFrame()
         pie_frame.setStyleSheet(f"background-color: {self.theme['bg_card']}; border: 1px solid {self.theme['border']}; border-radius: 40px;")
-        self.fig_pie = plt.figure(facecolor=self.theme['bg_card'])
-        self.canvas_pie = FigureCanvas(self.fig_pie)
-        QVBoxLayout(pie_frame).addWidget(self.canvas_pie)
+        self.pie_layout = QVBoxLayout(pie_frame)
         
         scat_frame = QFrame()
         scat_frame.setStyleSheet(f"background-color: {self.theme['bg_card']}; border: 1px solid {self.theme['border']}; border-radius: 40px;")
-        self.fig_scat = plt.figure(facecolor=self.theme['bg_card'])
-        self.canvas_scat = FigureCanvas(self.fig_scat)
-        QVBoxLayout(scat_frame).addWidget(self.canvas_scat)
+        self.scat_layout = QVBoxLayout(scat_frame)
         
         charts_row.addWidget(pie_frame, 1)
         charts_row.addWidget(scat_frame, 2)
@@ -286,8 +817,7 @@ class EquipmentVisualizer(QMainWindow):
         sim_h_layout.addWidget(self.btn_sim)
         dash_layout.addWidget(sim_box)
 
-        # Monitors Page
-        self.page_monitors = QWidget()
+    def build_monitors_page(self):
         mon_layout = QVBoxLayout(self.page_monitors)
         mon_layout.setContentsMargins(50, 50, 50, 50)
         
@@ -299,7 +829,7 @@ class EquipmentVisualizer(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Identify asset profile...")
         self.search_input.setFixedHeight(60)
-        self.search_input.textChanged.connect(self.refresh_ui)
+        self.search_input.textChanged.connect(lambda _: self.request_refresh(RefreshScheduler.TABLE))
         self.search_input.setStyleSheet(f"background-color: {self.theme['bg_input']}; border: 1px solid {self.theme['border']}; border-radius: 20px; padding: 18px; color: white; font-weight: 800; font-size: 13px;")
         mon_tools.addWidget(self.search_input)
         
@@ -317,10 +847,17 @@ class EquipmentVisualizer(QMainWindow):
         mon_tools.addWidget(thresh_box)
         mon_layout.addLayout(mon_tools)
 
-        self.table = QTableWidget()
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table_model = DatasetTableModel(self)
+        self.table_query = None
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Fixed row heights keep scrolling independent of the row count, and
+        # column widths are fitted to a sample of rows rather than 1,000
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setResizeContentsPrecision(100)
         self.table.setStyleSheet(f"""
-            QTableWidget {{ 
+            QTableView {{ 
                 background-color: {self.theme['bg_card']}; 
                 border: 1px solid {self.theme['border']}; 
                 border-radius: 30px; 
@@ -341,36 +878,54 @@ class EquipmentVisualizer(QMainWindow):
         """)
         mon_layout.addWidget(self.table)
 
-        # Ingestion Page
-        self.page_ingest = QWidget()
-        ing_layout = QVBoxLayout(self.page_ingest)
-        ing_layout.setContentsMargins(150, 150, 150, 150)
-        upload_area = QFrame()
-        upload_area.setStyleSheet(f"border: 5px dashed {self.theme['border']}; border-radius: 70px; background-color: {self.theme['bg_card']};")
-        upload_vbox = QVBoxLayout(upload_area)
-        upload_vbox.setAlignment(Qt.AlignCenter)
-        up_title = QLabel("Push Data Stream")
-        up_title.setStyleSheet("color: white; font-size: 42px; font-weight: 900; margin-bottom: 10px;")
-        up_desc = QLabel("Neural analytic mapping for CSV asset matrices.")
-        up_desc.setStyleSheet(f"color: {self.theme['text_muted']}; font-size: 16px; margin-bottom: 50px;")
-        
-        btn_browse = QPushButton("INITIALIZE DECRYPTION")
-        btn_browse.setFixedSize(340, 70)
-        btn_browse.setStyleSheet(f"QPushButton {{ background-color: {self.theme['accent']}; color: white; border-radius: 24px; font-weight: 900; font-size: 13px; tracking: 1px; }} QPushButton:hover {{ background-color: #1d4ed8; }}")
-        btn_browse.clicked.connect(self.upload_file)
-        
-        upload_vbox.addWidget(up_title, 0, Qt.AlignCenter)
-        upload_vbox.addWidget(up_desc, 0, Qt.AlignCenter)
-        upload_vbox.addWidget(btn_browse, 0, Qt.AlignCenter)
-        ing_layout.addWidget(upload_area)
+    def ensure_charts(self):
+        # Matplotlib is the single most expensive import; defer it to the first chart
+        if self.fig_pie is not None:
+            return
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        self.fig_pie = plt.figure(facecolor=self.theme['bg_card'])
+        self.canvas_pie = FigureCanvas(self.fig_pie)
+        self.pie_layout.addWidget(self.canvas_pie)
+        self.fig_scat = plt.figure(facecolor=self.theme['bg_card'])
+        self.canvas_scat = FigureCanvas(self.fig_scat)
+        self.scat_layout.addWidget(self.canvas_scat)
 
-        self.stack.addWidget(self.page_dash)
-        self.stack.addWidget(self.page_monitors)
-        self.stack.addWidget(self.page_ingest)
-        
-        layout.addWidget(sidebar)
-        layout.addWidget(self.stack)
-        self.set_tab(2)
+    def restore_cached_session(self):
+        """Paint the last dataset's summary before anything is fetched or parsed."""
+        try:
+            with open(LAST_SESSION_PATH) as f:
+                cached = json.load(f)
+            summary = cached['summary']
+        except (OSError, ValueError, KeyError):
+            return False
+        self.set_tab(0)
+        self.update_stat_cards(summary)
+        self.dash_source.setText(f"{cached['filename']} • CACHED SUMMARY")
+        return True
+
+    def set_current_data(self, data, df=None):
+        """Make `data` the active dataset; its rows live in the workspace, not in `current_data`."""
+        # Simulation drifts the view and the copied summary, never the workspace or the history entry
+        dataset = DatasetView(self.workspace.add(data, df))
+        self.current_data = {"id": data['id'], "filename": data['filename'], "summary": dict(data['summary']),
+                             "dataset": dataset}
+        self.active_id = data['id']
+        try:
+            os.makedirs(os.path.dirname(LAST_SESSION_PATH), exist_ok=True)
+            with open(LAST_SESSION_PATH, 'w') as f:
+                json.dump({"id": data['id'], "filename": data['filename'], "summary": data['summary']}, f, default=str)
+        except OSError:
+            pass
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_pending:
+            self.first_paint_pending = False
+            elapsed = time.perf_counter() - _MODULE_START
+            STAGE_SECONDS.observe(elapsed, stage='startup_first_paint')
+            if os.environ.get("EQUIPIQ_STARTUP_PROBE") == "1":
+                print(f"first_paint_ms={elapsed * 1000:.1f}", flush=True)
+                QTimer.singleShot(0, QApplication.instance().quit)
 
     def create_nav_btn(self, icon_char, label, index):
         # Increased leading space for icon alignment
@@ -398,6 +953,7 @@ class EquipmentVisualizer(QMainWindow):
         return btn
 
     def set_tab(self, index):
+        self.ensure_page(index)
         for i, btn in enumerate(self.nav_btns):
             btn.setChecked(i == index)
         self.stack.setCurrentIndex(index)
@@ -405,7 +961,8 @@ class EquipmentVisualizer(QMainWindow):
     def update_threshold(self, val):
         self.pressure_threshold = val
         self.thresh_val.setText(f"LIMIT: {val} bar")
-        if self.current_data: self.refresh_ui()
+        # Only pressure-dependent views change with the limit
+        if self.current_data: self.request_refresh(RefreshScheduler.TABLE, RefreshScheduler.SCATTER)
 
     def toggle_simulation(self, checked):
         self.is_simulating = checked
@@ -418,21 +975,16 @@ class EquipmentVisualizer(QMainWindow):
 
     def run_simulation_step(self):
         if not self.current_data: return
-        data = self.current_data['data']
-        for row in data:
-            row['Flowrate'] = max(0, round(row['Flowrate'] + (np.random.random() - 0.5) * 20, 2))
-            row['Pressure'] = max(0, round(row['Pressure'] + (np.random.random() - 0.5) * 4, 2))
-            row['Temperature'] = max(0, round(row['Temperature'] + (np.random.random() - 0.5) * 2, 2))
-        
-        df = pd.DataFrame(data)
-        self.current_data['summary'] = {
-            "totalCount": len(df),
-            "avgFlowrate": round(df['Flowrate'].mean(), 2),
-            "avgPressure": round(df['Pressure'].mean(), 2),
-            "avgTemperature": round(df['Temperature'].mean(), 2),
-            "typeDistribution": df['Type'].value_counts().to_dict() if 'Type' in df.columns else {}
-        }
-        self.refresh_ui()
+        dataset = self.current_data['dataset']
+        summary = self.current_data['summary']
+        # Drifted values replace the view's columns with heap arrays; the workspace stays mapped
+        for col, spread in (('Flowrate', 20), ('Pressure', 4), ('Temperature', 2)):
+            values = dataset.columns[col]
+            drift = (np.random.random(len(values)) - 0.5) * spread
+            dataset.columns[col] = np.maximum(0, np.round(values + drift, 2))
+            summary[f"avg{col}"] = round(float(np.nanmean(dataset.columns[col])), 2) if len(values) else 0
+        # Drift never changes the Type mix, so the pie stays as it is
+        self.request_refresh(RefreshScheduler.CARDS, RefreshScheduler.TABLE, RefreshScheduler.SCATTER)
 
     def fetch_history(self):
         try:
@@ -460,6 +1012,10 @@ class EquipmentVisualizer(QMainWindow):
                 item.widget().deleteLater()
         
         for item in history:
+            # Rows go to the workspace once; buttons only keep the lightweight metadata
+            if not self.workspace.contains(item):
+                self.workspace.add(item)
+            item = {k: v for k, v in item.items() if k != 'data'}
             is_active = (self.active_id == item['id'])
             btn = HistoryItem(item, self.load_history_item, self.theme, is_active)
             self.history_layout.insertWidget(self.history_layout.count()-1, btn)
@@ -470,9 +1026,8 @@ class EquipmentVisualizer(QMainWindow):
             self.history_layout.insertWidget(0, empty)
 
     def load_history_item(self, item_data):
-        self.current_data = item_data
-        self.active_id = item_data['id']
-        self.refresh_ui()
+        self.set_current_data(item_data)
+        self.request_refresh()
         self.fetch_history()
         self.set_tab(0)
 
@@ -480,25 +1035,54 @@ class EquipmentVisualizer(QMainWindow):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open Asset Matrix", "", "CSV Files (*.csv)")
         if file_path:
             if not self.is_offline_mode:
+                if os.path.getsize(file_path) > CHUNKED_UPLOAD_THRESHOLD:
+                    self.start_chunked_upload(file_path)
+                    return
                 try:
                     with open(file_path, 'rb') as f:
                         files = {'file': (os.path.basename(file_path), f, 'text/csv')}
                         response = requests.post(f"{BASE_URL}/upload/", files=files)
                     if response.status_code == 201:
-                        res_json = response.json()
-                        self.current_data = res_json
-                        self.active_id = res_json['id']
-                        self.refresh_ui()
-                        self.fetch_history()
-                        self.set_tab(0)
+                        self.show_uploaded_dataset(response.json())
                         return
                 except Exception:
                     pass
             self.process_local_csv(file_path)
 
+    def start_chunked_upload(self, file_path):
+        """Upload in the background; the terminal stays responsive and shows chunk progress."""
+        self.btn_browse.setEnabled(False)
+        worker = ChunkedUploadWorker(file_path, self)
+        worker.progress.connect(self.show_upload_progress)
+        worker.succeeded.connect(lambda dataset: self.finish_chunked_upload(file_path, dataset))
+        worker.failed.connect(lambda _error: self.finish_chunked_upload(file_path, None))
+        worker.finished.connect(worker.deleteLater)
+        self.upload_worker = worker
+        worker.start()
+
+    def show_upload_progress(self, received, total):
+        self.st_dot.setStyleSheet(f"color: {self.theme['accent']};")
+        self.st_text.setText("Committing Upload..." if received >= total else f"Uploading {received}/{total} Chunks")
+
+    def finish_chunked_upload(self, file_path, dataset):
+        self.upload_worker = None
+        self.btn_browse.setEnabled(True)
+        if dataset is not None:
+            self.show_uploaded_dataset(dataset)
+        else:
+            self.fetch_history()  # restores the connection status shown during the upload
+            self.process_local_csv(file_path)
+
+    def show_uploaded_dataset(self, dataset):
+        self.set_current_data(dataset)
+        self.request_refresh()
+        self.fetch_history()
+        self.set_tab(0)
+
     def process_local_csv(self, path):
+        from equipment.parsing import read_equipment_csv
         try:
-            df = pd.read_csv(path)
+            df, quarantine = read_equipment_csv(path)
             summary = {
                 "totalCount": len(df),
                 "avgFlowrate": round(df['Flowrate'].mean(), 2),
@@ -506,55 +1090,65 @@ class EquipmentVisualizer(QMainWindow):
                 "avgTemperature": round(df['Temperature'].mean(), 2),
                 "typeDistribution": df['Type'].value_counts().to_dict() if 'Type' in df.columns else {"General": len(df)}
             }
-            self.current_data = {
+            self.set_current_data({
                 "id": f"local-{pd.Timestamp.now().value}",
                 "filename": os.path.basename(path) + " (OFFLINE)",
-                "data": df.to_dict('records'),
                 "summary": summary
-            }
-            self.active_id = self.current_data["id"]
-            self.refresh_ui()
+            }, df)
+            self.request_refresh()
             self.set_tab(0)
+            if quarantine:
+                lines = ", ".join(str(q['line']) for q in quarantine[:10])
+                QMessageBox.warning(self, "Rows Quarantined", f"{len(quarantine)} malformed cell(s) skipped (lines {lines}{'...' if len(quarantine) > 10 else ''}).")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Stream processing failed: {str(e)}")
 
-    def refresh_ui(self):
+    def request_refresh(self, *parts):
+        """Schedule a repaint of `parts` (all parts if none given) on the next frame."""
+        self.refresh_scheduler.mark(parts or RefreshScheduler.ALL)
+
+    @timed('refresh_ui')
+    def refresh_ui(self, parts=RefreshScheduler.ALL):
         if not self.current_data: return
+        self.ensure_page(0)
+        self.ensure_page(1)
         summary = self.current_data['summary']
-        raw_data = self.current_data['data']
+        dataset = self.current_data['dataset']
+
+        if RefreshScheduler.CARDS in parts:
+            self.update_stat_cards(summary)
+            self.dash_source.setText(self.current_data['filename'])
+        if RefreshScheduler.TABLE in parts:
+            self.render_table(dataset)
+        if RefreshScheduler.PIE in parts or RefreshScheduler.SCATTER in parts:
+            self.render_charts(summary, dataset, parts)
+
+    @timed('render_table')
+    def render_table(self, dataset):
         search_txt = self.search_input.text().lower()
-        
-        filtered = [r for r in raw_data if search_txt in str(r.get('Equipment Name', '')).lower() or search_txt in str(r.get('Type', '')).lower()]
-        
+        if self.table_query == (dataset, search_txt):
+            # Same rows; only the pressure limit or the metric values can have changed
+            self.table_model.refresh_values(self.pressure_threshold)
+            return
+        self.table_query = (dataset, search_txt)
+        self.table_model.set_rows(dataset, dataset.search(search_txt), self.pressure_threshold)
+        self.table.resizeColumnsToContents()
+
+    def update_stat_cards(self, summary):
         self.card_units.update_value(summary['totalCount'])
         self.card_flow.update_value(summary['avgFlowrate'])
         self.card_press.update_value(summary['avgPressure'])
         self.card_temp.update_value(summary['avgTemperature'])
-        
-        self.table.setRowCount(len(filtered))
-        cols = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature', 'Status']
-        self.table.setColumnCount(len(cols))
-        self.table.setHorizontalHeaderLabels(cols)
-        for i, row in enumerate(filtered):
-            for j, col in enumerate(cols):
-                if col == 'Status':
-                    p = row.get('Pressure', 0)
-                    status = "CRITICAL" if p > self.pressure_threshold else "STABLE"
-                    item = QTableWidgetItem(status)
-                    item.setForeground(QColor("#f43f5e" if status == "CRITICAL" else "#2563eb"))
-                else:
-                    val = row.get(col, '0')
-                    item = QTableWidgetItem(str(val))
-                    if col == 'Pressure' and float(val) > self.pressure_threshold:
-                        item.setForeground(QColor("#f43f5e"))
-                        item.setFont(QFont("Inter", 11, QFont.Black))
-                    else:
-                        item.setForeground(QColor("#a1a1aa"))
-                self.table.setItem(i, j, item)
-        self.table.resizeColumnsToContents()
-        self.render_charts(summary, raw_data)
 
-    def render_charts(self, summary, raw_data):
+    @timed('render_charts')
+    def render_charts(self, summary, dataset, parts=RefreshScheduler.ALL):
+        self.ensure_charts()
+        if RefreshScheduler.PIE in parts:
+            self.render_pie(summary)
+        if RefreshScheduler.SCATTER in parts:
+            self.render_scatter(dataset)
+
+    def render_pie(self, summary):
         self.fig_pie.clear()
         ax1 = self.fig_pie.add_subplot(111)
         ax1.set_facecolor(self.theme['bg_card'])
@@ -563,13 +1157,16 @@ class EquipmentVisualizer(QMainWindow):
         ax1.set_title("ASSET CLASSIFICATION", color="#71717a", fontweight="black", fontsize=10, pad=15)
         self.canvas_pie.draw()
 
+    def render_scatter(self, dataset):
         self.fig_scat.clear()
         ax2 = self.fig_scat.add_subplot(111)
         ax2.set_facecolor(self.theme['bg_card'])
-        df = pd.DataFrame(raw_data)
-        if not df.empty and 'Flowrate' in df.columns and 'Pressure' in df.columns:
-            colors = ['#f43f5e' if p > self.pressure_threshold else '#2563eb' for p in df['Pressure']]
-            ax2.scatter(df['Flowrate'], df['Pressure'], c=colors, alpha=0.7, edgecolors='white', s=60)
+        if len(dataset):
+            # An even stride keeps the shape of the cloud; beyond this many markers matplotlib dominates the refresh
+            step = -(-len(dataset) // SCATTER_MAX_POINTS)
+            flow, pressure = dataset.columns['Flowrate'][::step], dataset.columns['Pressure'][::step]
+            colors = np.where(pressure > self.pressure_threshold, '#f43f5e', '#2563eb')
+            ax2.scatter(flow, pressure, c=colors, alpha=0.7, edgecolors='white', s=60)
             ax2.set_title("OPERATIONAL DRIFT MATRIX", color="#71717a", fontweight="black", fontsize=10, pad=15)
             ax2.grid(True, color='#27272a', linestyle='--', alpha=0.5)
             ax2.tick_params(colors='#52525b', labelsize=8)
@@ -583,67 +1180,71 @@ class EquipmentVisualizer(QMainWindow):
         if not save_path: return
         
         try:
-            with PdfPages(save_path) as pdf:
-                # Page 1: Technical Analysis
-                fig = plt.figure(figsize=(8.27, 11.69))
-                plt.suptitle(f"EquipIQ Pro Technical Audit Report", fontsize=22, fontweight='black', y=0.96)
-                plt.figtext(0.1, 0.92, f"Target Matrix: {self.current_data['filename']}", fontsize=11, color='#52525b')
-                plt.figtext(0.1, 0.90, f"Analysis Time: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}", fontsize=9, color='#a1a1aa')
-                
-                summary = self.current_data['summary']
-                stats_box = (f"OPERATIONAL AUDIT SUMMARY\n"
-                           f"--------------------------\n"
-                           f"Asset Count:          {summary['totalCount']}\n"
-                           f"Mean Flow Stability:  {summary['avgFlowrate']} L/h\n"
-                           f"Mean Pressure:        {summary['avgPressure']} bar\n"
-                           f"Thermal Baseline:     {summary['avgTemperature']} °C")
-                plt.figtext(0.1, 0.74, stats_box, fontsize=12, family='monospace', 
-                            bbox=dict(facecolor='#f8fafc', alpha=1, edgecolor='#e2e8f0', pad=15, boxstyle='round,pad=1'))
-
-                ax1 = fig.add_subplot(223)
-                dist = summary['typeDistribution']
-                ax1.pie(dist.values(), labels=dist.keys(), autopct='%1.1f%%', colors=['#2563eb', '#f59e0b', '#6366f1', '#06b6d4'], textprops={'fontsize': 8})
-                ax1.set_title("Asset Classification Mapping", fontweight='black', fontsize=10, pad=10)
-
-                ax2 = fig.add_subplot(224)
-                df = pd.DataFrame(self.current_data['data'])
-                colors = ['#f43f5e' if p > self.pressure_threshold else '#2563eb' for p in df['Pressure']]
-                ax2.scatter(df['Flowrate'], df['Pressure'], c=colors, alpha=0.5, s=25)
-                ax2.set_xlabel("Flow (L/h)", fontsize=8)
-                ax2.set_ylabel("Pressure (bar)", fontsize=8)
-                ax2.set_title("Operational Drift Performance", fontweight='black', fontsize=10, pad=10)
-                ax2.grid(True, linestyle='--', alpha=0.3)
-                
-                plt.subplots_adjust(hspace=0.5, wspace=0.3, top=0.85, bottom=0.15)
-                pdf.savefig()
-                plt.close()
-
-                # Page 2: Full Registry Log
-                fig2 = plt.figure(figsize=(8.27, 11.69))
-                plt.suptitle("Technical Registry Log", fontsize=16, fontweight='black', y=0.96)
-                ax_table = fig2.add_subplot(111)
-                ax_table.axis('off')
-                
-                table_df = df[['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']].head(40)
-                table = ax_table.table(cellText=table_df.values, colLabels=table_df.columns, loc='center', cellLoc='left')
-                table.auto_set_font_size(False)
-                table.set_fontsize(8)
-                table.scale(1.1, 2.0)
-                
-                for (row, col), cell in table.get_celld().items():
-                    if row == 0:
-                        cell.set_text_props(fontweight='black', color='white')
-                        cell.set_facecolor('#0f172a')
-                    elif row % 2 == 0:
-                        cell.set_facecolor('#f8fafc')
-
-                pdf.savefig()
-                plt.close()
-
+            self.write_pdf_report(save_path)
             QMessageBox.information(self, "Audit Finalized", "Technical audit archived to PDF with full analytic mapping.")
         except Exception as e:
             QMessageBox.critical(self, "Audit Error", f"Technical report generation failed: {str(e)}")
 
+    @timed('generate_pdf_report')
+    def write_pdf_report(self, save_path):
+        from matplotlib.backends.backend_pdf import PdfPages
+        with PdfPages(save_path) as pdf:
+            # Page 1: Technical Analysis
+            fig = plt.figure(figsize=(8.27, 11.69))
+            plt.suptitle(f"EquipIQ Pro Technical Audit Report", fontsize=22, fontweight='black', y=0.96)
+            plt.figtext(0.1, 0.92, f"Target Matrix: {self.current_data['filename']}", fontsize=11, color='#52525b')
+            plt.figtext(0.1, 0.90, f"Analysis Time: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}", fontsize=9, color='#a1a1aa')
+            
+            summary = self.current_data['summary']
+            stats_box = (f"OPERATIONAL AUDIT SUMMARY\n"
+                       f"--------------------------\n"
+                       f"Asset Count:          {summary['totalCount']}\n"
+                       f"Mean Flow Stability:  {summary['avgFlowrate']} L/h\n"
+                       f"Mean Pressure:        {summary['avgPressure']} bar\n"
+                       f"Thermal Baseline:     {summary['avgTemperature']} °C")
+            plt.figtext(0.1, 0.74, stats_box, fontsize=12, family='monospace', 
+                        bbox=dict(facecolor='#f8fafc', alpha=1, edgecolor='#e2e8f0', pad=15, boxstyle='round,pad=1'))
+
+            ax1 = fig.add_subplot(223)
+            dist = summary['typeDistribution']
+            ax1.pie(dist.values(), labels=dist.keys(), autopct='%1.1f%%', colors=['#2563eb', '#f59e0b', '#6366f1', '#06b6d4'], textprops={'fontsize': 8})
+            ax1.set_title("Asset Classification Mapping", fontweight='black', fontsize=10, pad=10)
+
+            ax2 = fig.add_subplot(224)
+            df = self.current_data['dataset'].frame()
+            colors = np.where(df['Pressure'] > self.pressure_threshold, '#f43f5e', '#2563eb')
+            ax2.scatter(df['Flowrate'], df['Pressure'], c=colors, alpha=0.5, s=25)
+            ax2.set_xlabel("Flow (L/h)", fontsize=8)
+            ax2.set_ylabel("Pressure (bar)", fontsize=8)
+            ax2.set_title("Operational Drift Performance", fontweight='black', fontsize=10, pad=10)
+            ax2.grid(True, linestyle='--', alpha=0.3)
+            
+            plt.subplots_adjust(hspace=0.5, wspace=0.3, top=0.85, bottom=0.15)
+            pdf.savefig()
+            plt.close()
+
+            # Page 2: Full Registry Log
+            fig2 = plt.figure(figsize=(8.27, 11.69))
+            plt.suptitle("Technical Registry Log", fontsize=16, fontweight='black', y=0.96)
+            ax_table = fig2.add_subplot(111)
+            ax_table.axis('off')
+            
+            table_df = df[['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']].head(40)
+            table = ax_table.table(cellText=table_df.values, colLabels=table_df.columns, loc='center', cellLoc='left')
+            table.auto_set_font_size(False)
+            table.set_fontsize(8)
+            table.scale(1.1, 2.0)
+            
+            for (row, col), cell in table.get_celld().items():
+                if row == 0:
+                    cell.set_text_props(fontweight='black', color='white')
+                    cell.set_facecolor('#0f172a')
+                elif row % 2 == 0:
+                    cell.set_facecolor('#f8fafc')
+
+            pdf.savefig()
+            plt.close()
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
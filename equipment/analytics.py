@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+NAME_COL = 'Equipment Name'
+TYPE_COL = 'Type'
+METRIC_COLS = ['Flowrate', 'Pressure', 'Temperature']
+REQUIRED_COLS = [NAME_COL, TYPE_COL] + METRIC_COLS
+
+
+def build_summary(df):
+    """Statistical summary stored alongside every dataset."""
+    return {
+        "totalCount": int(df.shape[0]),
+        "avgFlowrate": round(float(df['Flowrate'].mean()), 2),
+        "avgPressure": round(float(df['Pressure'].mean()), 2),
+        "avgTemperature": round(float(df['Temperature'].mean()), 2),
+        "typeDistribution": {str(k): int(v) for k, v in df['Type'].value_counts().items()}
+    }
+
+
+def _round(value):
+    if value is None or pd.isna(value):
+        return None
+    return round(float(value), 2) + 0.0  # normalise -0.0
+
+
+def _decode_names(columns, rows):
+    blob, offsets = columns['name_blob'], columns['name_offsets']
+    return [bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in rows]
+
+
+def _asset_codes(snapshots):
+    """
+    Factorise the name keys of all snapshots: one code per distinct key, for
+    every row in concatenated order. Each snapshot's keys are presorted
+    (name_order), so the stable sort below only merges sorted runs.
+    """
+    offset, sorted_keys, positions = 0, [], []
+    for c in snapshots:
+        sorted_keys.append(c['name_keys'][c['name_order']])
+        positions.append(c['name_order'] + offset)
+        offset += len(c['name_keys'])
+    keys, positions = np.concatenate(sorted_keys), np.concatenate(positions)
+    merge = np.argsort(keys, kind='stable')
+    keys = keys[merge]
+    starts = np.empty(len(keys), dtype=bool)
+    starts[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=starts[1:])
+    codes = np.empty(len(keys), dtype='int64')
+    codes[positions[merge]] = np.cumsum(starts) - 1
+    return codes, int(starts.sum())
+
+
+def _group_means(codes, values, size, unique=False):
+    """NaN-skipping mean of `values` per code (NaN for codes with no values)."""
+    if unique:
+        means = np.full(size, np.nan)
+        means[codes] = values
+        return means
+    valid = ~np.isnan(values)
+    if valid.all():
+        totals = np.bincount(codes, weights=values, minlength=size)
+        counts = np.bincount(codes, minlength=size)
+    else:
+        totals = np.bincount(codes, weights=np.where(valid, values, 0.0), minlength=size)
+        counts = np.bincount(codes, weights=valid, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / counts
+
+
+def compare_datasets(datasets, asset_limit=100):
+    """
+    Compare snapshots ordered oldest -> newest.
+
+    `datasets` is a sequence of (id, filename, timestamp, columns) tuples, where
+    `columns` holds the arrays of a dataset's columnar sidecar (see
+    columns.frame_columns). Assets are matched on the 64-bit hash of Equipment
+    Name: the keys of all snapshots are factorised once and every per-asset
+    and per-Type aggregate is a scatter or bincount over those codes, so no
+    row is materialised. Duplicate names inside a snapshot are averaged. Only the
+    `asset_limit` largest movers are serialized (and their names decoded);
+    `assetCount` gives the total.
+    """
+    ids = [ds[0] for ds in datasets]
+    snapshots = [ds[3] for ds in datasets]
+    bounds = np.cumsum([0] + [len(c['name_keys']) for c in snapshots])
+    codes, asset_count = _asset_codes(snapshots)
+    type_names = list(dict.fromkeys(str(t) for c in snapshots for t in c['types']))
+
+    per_asset, type_codes = {}, []
+    asset_types = np.full(asset_count, -1)
+    present = np.zeros(asset_count, dtype='int64')
+    for i, c in enumerate(snapshots):
+        asset_codes = codes[bounds[i]:bounds[i + 1]]
+        lookup = np.array([type_names.index(str(t)) for t in c['types']] + [-1], dtype='int64')
+        row_types = lookup[c['type_codes']]  # code -1 picks the trailing -1
+        type_codes.append(row_types)
+        rows = np.bincount(asset_codes, minlength=asset_count)
+        present += rows > 0
+        if i in (0, len(snapshots) - 1):
+            # Deltas only need the oldest and newest snapshot
+            unique = rows.max(initial=0) <= 1
+            per_asset[i] = {m: _group_means(asset_codes, c[m], asset_count, unique) for m in METRIC_COLS}
+        # An asset's Type is that of its first row with one (assigned in reverse
+        # so the first write wins); newer snapshots overwrite older ones
+        known = row_types >= 0
+        asset_types[asset_codes[known][::-1]] = row_types[known][::-1]
+
+    deltas = {m: per_asset[len(snapshots) - 1][m] - per_asset[0][m] for m in METRIC_COLS}
+    movement = np.fmax.reduce([np.abs(d) for d in deltas.values()])
+    top = pd.Series(np.nan_to_num(movement, nan=-1.0)).nlargest(asset_limit).index.to_numpy()
+
+    # Decode a name for the returned assets only, from their first occurrence
+    rows = np.flatnonzero(np.isin(codes, top))
+    _, first_rows = np.unique(codes[rows], return_index=True)
+    owner = {}
+    for row in rows[first_rows]:
+        i = int(np.searchsorted(bounds, row, side='right')) - 1
+        owner[int(codes[row])] = _decode_names(snapshots[i], [row - bounds[i]])[0]
+    assets = [{
+        "name": owner[int(code)],
+        "type": type_names[asset_types[code]] if asset_types[code] >= 0 else None,
+        "presentIn": int(present[code]),
+        "flowrateDelta": _round(deltas['Flowrate'][code]),
+        "pressureDelta": _round(deltas['Pressure'][code]),
+        "temperatureDelta": _round(deltas['Temperature'][code]),
+    } for code in top]
+
+    # Per-Type trend: mean of each metric per snapshot, then the least-squares
+    # slope across snapshot order.
+    x = np.arange(len(ids), dtype=float)
+    type_count = len(type_names)
+    type_means, type_rows = {m: [] for m in METRIC_COLS}, np.zeros(type_count, dtype='int64')
+    for c, row_types in zip(snapshots, type_codes):
+        typed = row_types >= 0
+        if not typed.all():
+            row_types, c = row_types[typed], {m: c[m][typed] for m in METRIC_COLS}
+        type_rows += np.bincount(row_types, minlength=type_count)
+        for m in METRIC_COLS:
+            type_means[m].append(_group_means(row_types, c[m], type_count))
+    type_trends = {}
+    for t, type_name in enumerate(type_names):
+        if not type_rows[t]:
+            continue
+        entry = {}
+        for metric in METRIC_COLS:
+            series = np.array([means[t] for means in type_means[metric]], dtype=float)
+            mask = ~np.isnan(series)
+            slope = np.polyfit(x[mask], series[mask], 1)[0] if mask.sum() > 1 else None
+            entry[metric.lower()] = {
+                "means": [_round(v) for v in series],
+                "delta": _round(series[mask][-1] - series[mask][0]) if mask.any() else None,
+                "slope": _round(slope),
+            }
+        type_trends[type_name] = entry
+
+    fleet = {
+        "datasetCount": len(ids),
+        "totalRows": int(bounds[-1]),
+        "uniqueAssets": int(asset_count),
+        "commonAssets": int((present == len(ids)).sum()),
+    }
+    for metric in METRIC_COLS:
+        total = sum(float(np.nansum(c[metric])) for c in snapshots)
+        counted = sum(int(np.count_nonzero(~np.isnan(c[metric]))) for c in snapshots)
+        fleet['avg' + metric] = _round(total / counted) if counted else None
+
+    return {
+        "datasets": [
+            {"id": ds[0], "filename": ds[1], "timestamp": ds[2]} for ds in datasets
+        ],
+        "fleet": fleet,
+        "typeTrends": type_trends,
+        "assetCount": int(asset_count),
+        "assets": assets,
+    }
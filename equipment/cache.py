@@ -0,0 +1,190 @@
+"""
+Cache tier for dataset payloads (the 'datasets' entry in settings.CACHES).
+
+Datasets never change after upload, so per-dataset entries (summaries,
+serialized row pages, comparisons) stay valid until the dataset is pruned.
+Only the history listing depends on which datasets exist; it is dropped on
+every upload and prune. Each per-dataset key is recorded under
+`dataset:<id>:keys` so pruning deletes exactly the entries built from the
+pruned datasets.
+
+Invalidation only reaches the cache of the process that uploaded or pruned,
+and the default backend is per process. Listings are therefore stored with
+the registry version they were built from (see cached_listing()), so uploads
+and prunes made by other server workers or `manage.py ingest` are picked up
+on the next request.
+
+Every invalidation also bumps `cache:generation`. cached() reads the
+generation before computing and stores its result only if no invalidation
+happened meanwhile, so a listing built before an upload or prune is never
+written back after it.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import REGISTRY
+
+HISTORY_IDS_KEY = 'history:ids'
+HISTORY_BODY_KEY = 'history:body'
+GENERATION_KEY = 'cache:generation'
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    'equipiq_cache_lookups_total', 'Dataset cache lookups by payload kind.', ['kind', 'result'])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    'equipiq_cache_hit_ratio', 'Dataset cache hits / lookups since process start.', ['kind'])
+
+_stats_lock = threading.Lock()
+_stats = {}  # kind -> [hits, lookups]
+
+
+_sizes = {}  # LocMemCache name -> total bytes of its pickled values
+
+
+class BoundedLocMemCache(LocMemCache):
+    """
+    LocMemCache whose LRU is also bounded by OPTIONS['MAX_BYTES'], the total
+    size of the pickled values, since a few large row pages or listings can
+    outweigh hundreds of summaries.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_bytes = params.get('OPTIONS', {}).get('MAX_BYTES')
+        self._size = _sizes.setdefault(name, [0])
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._delete(key)
+        super()._set(key, value, timeout)
+        self._size[0] += len(value)
+        while self._max_bytes and self._size[0] > self._max_bytes and len(self._cache) > 1:
+            self._delete(next(reversed(self._cache)))  # least recently used
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._size[0] = 0
+        else:
+            for key in list(reversed(self._cache))[:len(self._cache) // self._cull_frequency]:
+                self._delete(key)
+
+    def _delete(self, key):
+        value = self._cache.get(key)
+        if not super()._delete(key):
+            return False
+        self._size[0] -= len(value)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._size[0] = 0
+
+
+def dataset_cache():
+    return caches['datasets']
+
+
+def _record(kind, hit):
+    CACHE_LOOKUPS.inc(kind=kind, result='hit' if hit else 'miss')
+    with _stats_lock:
+        stats = _stats.setdefault(kind, [0, 0])
+        stats[0] += hit
+        stats[1] += 1
+        ratio = stats[0] / stats[1]
+    CACHE_HIT_RATIO.set(ratio, kind=kind)
+
+
+def _tracking_key(dataset_id):
+    return f'dataset:{dataset_id}:keys'
+
+
+def _track(dataset_ids, keys):
+    cache = dataset_cache()
+    for dataset_id in dataset_ids:
+        tracked = cache.get(_tracking_key(dataset_id), [])
+        cache.set(_tracking_key(dataset_id), tracked + [k for k in keys if k not in tracked])
+
+
+def _storable(value):
+    limit = getattr(settings, 'DATASET_CACHE_MAX_ENTRY_BYTES', None)
+    return not (limit and isinstance(value, bytes) and len(value) > limit)
+
+
+def _generation():
+    return dataset_cache().get_or_set(GENERATION_KEY, 0)
+
+
+def _bump_generation():
+    cache = dataset_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:  # not set yet (or culled): any fresh value differs from what readers saw
+        if not cache.add(GENERATION_KEY, 1):
+            cache.incr(GENERATION_KEY)
+
+
+def cached(kind, key, compute, dataset_ids=()):
+    """
+    Return the value under `key`, calling compute() and storing its result on a miss.
+
+    `dataset_ids` are the datasets the value is built from; pruning any of them
+    drops the entry. A None result is returned but not cached, and so is a
+    result computed while an invalidation ran.
+    """
+    cache = dataset_cache()
+    generation = _generation()
+    value = cache.get(key)
+    _record(kind, value is not None)
+    if value is None:
+        value = compute()
+        if value is not None and _storable(value) and _generation() == generation:
+            cache.set(key, value)
+            _track(dataset_ids, [key])
+    return value
+
+
+def cached_listing(key, version, compute):
+    """
+    cached() for the history listings, which depend on which datasets exist.
+
+    `version` fingerprints the registry as seen by the database; an entry built
+    for another version counts as a miss and is replaced.
+    """
+    cache = dataset_cache()
+    generation = _generation()
+    entry = cache.get(key)
+    hit = entry is not None and entry[0] == version
+    _record('history', hit)
+    if hit:
+        return entry[1]
+    value = compute()
+    if _storable(value) and _generation() == generation:
+        cache.set(key, (version, value))
+    return value
+
+
+def store_many(entries, dataset_ids=()):
+    """Store {key: value} computed alongside a miss (e.g. read-ahead pages)."""
+    entries = {key: value for key, value in entries.items() if _storable(value)}
+    dataset_cache().set_many(entries)
+    _track(dataset_ids, list(entries))
+
+
+def invalidate_history():
+    _bump_generation()
+    dataset_cache().delete_many([HISTORY_IDS_KEY, HISTORY_BODY_KEY])
+
+
+def invalidate_datasets(dataset_ids):
+    """Drop every entry built from `dataset_ids`, and the history listing."""
+    cache = dataset_cache()
+    tracking_keys = [_tracking_key(dataset_id) for dataset_id in dataset_ids]
+    keys = [key for tracked in cache.get_many(tracking_keys).values() for key in tracked]
+    cache.delete_many(keys + tracking_keys)
+    invalidate_history()
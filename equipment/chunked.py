@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from django.conf import settings
+
+COPY_BUFFER = 1024 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk or commit request that the client must correct or retry."""
+
+
+class ChunkedUpload:
+    """
+    On-disk state of one resumable upload.
+
+    Layout under CHUNKED_UPLOAD_DIR/<upload_id>/:
+        manifest.json   filename, size, chunk size, chunk count, optional sha256
+        data.part       preallocated to `size`; chunk n is written at n * chunk_size
+        chunks/<n>      empty marker created only after chunk n was written and verified
+
+    Markers are separate files so parallel chunk requests never rewrite shared
+    state, and a client can resume by asking which markers exist.
+    """
+
+    def __init__(self, upload_id):
+        self.upload_id = upload_id
+        self.path = os.path.join(settings.CHUNKED_UPLOAD_DIR, upload_id)
+        self.data_path = os.path.join(self.path, 'data.part')
+        self.chunks_path = os.path.join(self.path, 'chunks')
+        with open(os.path.join(self.path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, filename, size, chunk_size, sha256=None):
+        if not 0 < size <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise ChunkError(f"size must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE}")
+        if not 0 < chunk_size <= settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            raise ChunkError(f"chunkSize must be between 1 and {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE}")
+        cls.purge_expired()
+
+        upload_id = str(uuid.uuid4())
+        path = os.path.join(settings.CHUNKED_UPLOAD_DIR, upload_id)
+        os.makedirs(os.path.join(path, 'chunks'))
+        manifest = {
+            "filename": os.path.basename(filename),
+            "size": size,
+            "chunkSize": chunk_size,
+            "totalChunks": -(-size // chunk_size),
+            "sha256": sha256,
+            "created": time.time(),
+        }
+        try:
+            with open(os.path.join(path, 'data.part'), 'wb') as f:
+                f.truncate(size)
+        except OSError as e:
+            # e.g. beyond the filesystem's file size limit
+            shutil.rmtree(path, ignore_errors=True)
+            raise ChunkError(f"Cannot reserve {size} bytes: {e.strerror}") from e
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        return cls(upload_id)
+
+    @classmethod
+    def load(cls, upload_id):
+        """Return the upload, or None if it is unknown or already committed."""
+        try:
+            return cls(upload_id)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def purge_expired():
+        root = settings.CHUNKED_UPLOAD_DIR
+        if not os.path.isdir(root):
+            return
+        cutoff = time.time() - settings.CHUNKED_UPLOAD_EXPIRY_SECONDS
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            # data.part is touched by every chunk, so this measures inactivity
+            activity = os.path.join(path, 'data.part')
+            try:
+                last_seen = os.path.getmtime(activity)
+            except OSError:
+                last_seen = os.path.getmtime(path)
+            if last_seen < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def received_chunks(self):
+        return sorted(int(name) for name in os.listdir(self.chunks_path))
+
+    def missing_chunks(self):
+        received = set(self.received_chunks())
+        return [n for n in range(self.manifest['totalChunks']) if n not in received]
+
+    def expected_length(self, index):
+        chunk_size = self.manifest['chunkSize']
+        return min(chunk_size, self.manifest['size'] - index * chunk_size)
+
+    def write_chunk(self, index, stream, checksum):
+        """Stream one chunk into place, verifying its length and sha256."""
+        if not 0 <= index < self.manifest['totalChunks']:
+            raise ChunkError(f"Chunk index out of range (0-{self.manifest['totalChunks'] - 1})")
+        marker = os.path.join(self.chunks_path, str(index))
+        # A re-sent chunk overwrites the old bytes, so it is unverified until it passes again
+        if os.path.exists(marker):
+            os.remove(marker)
+
+        expected = self.expected_length(index)
+        digest = hashlib.sha256()
+        remaining = expected
+        with open(self.data_path, 'r+b') as f:
+            f.seek(index * self.manifest['chunkSize'])
+            while remaining:
+                block = stream.read(min(COPY_BUFFER, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                remaining -= len(block)
+        if remaining or stream.read(1):
+            raise ChunkError(f"Chunk {index} must be exactly {expected} bytes")
+        if checksum and digest.hexdigest() != checksum.lower():
+            raise ChunkError(f"Checksum mismatch for chunk {index}")
+        open(marker, 'w').close()
+
+    def open_committed(self):
+        """Verify completeness (and the whole-file digest if one was declared)."""
+        missing = self.missing_chunks()
+        if missing:
+            raise ChunkError(f"Missing chunks: {', '.join(map(str, missing[:20]))}")
+        if self.manifest.get('sha256'):
+            digest = hashlib.sha256()
+            with open(self.data_path, 'rb') as f:
+                for block in iter(lambda: f.read(COPY_BUFFER), b''):
+                    digest.update(block)
+            if digest.hexdigest() != self.manifest['sha256'].lower():
+                raise ChunkError("File checksum mismatch")
+        return open(self.data_path, 'rb')
+
+    def discard(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def status(self):
+        return {
+            "uploadId": self.upload_id,
+            "filename": self.manifest['filename'],
+            "size": self.manifest['size'],
+            "chunkSize": self.manifest['chunkSize'],
+            "totalChunks": self.manifest['totalChunks'],
+            "receivedChunks": self.received_chunks(),
+        }
@@ -0,0 +1,122 @@
+"""
+Columnar sidecar files for stored datasets.
+
+raw_data_json keeps every row in the registry, but decoding it takes seconds
+for a million-row snapshot. At ingest every dataset is therefore also written
+to DATASET_COLUMNS_DIR/<id>/ as one .npy file per array (the layout of the
+desktop terminal's workspace):
+
+    Flowrate, Pressure, Temperature   float64 metrics
+    type_codes, types                 int32 Type codes (-1 = missing) and the category list
+    name_keys, name_order             uint64 hash of each Equipment Name (the join key)
+                                      and the permutation that sorts it
+    name_offsets, name_blob           Equipment Name as a UTF-8 blob with offsets
+    fields                            the keys of the stored raw_data_json records
+
+load_columns() maps the files read-only, so analytics.compare_datasets() can
+join snapshots on name_keys while only the name pages of the assets it returns
+are ever read. When the records hold only the required columns, page_records()
+rebuilds any range of them from the arrays, so /api/datasets/<id>/rows/ never
+decodes raw_data_json. frame_columns() does not need Django, so `manage.py ingest` pool
+workers build the arrays and the writer only saves them.
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .analytics import NAME_COL, TYPE_COL, METRIC_COLS, REQUIRED_COLS
+
+
+def _name_blob(names):
+    """UTF-8 blob and offsets for an object array of str."""
+    text = ''.join(names)
+    blob = text.encode('utf-8')
+    if len(blob) == len(text):
+        lengths = np.fromiter(map(len, names), dtype='int64', count=len(names))  # ASCII: chars == bytes
+    else:
+        lengths = np.fromiter((len(name.encode('utf-8')) for name in names), dtype='int64', count=len(names))
+    offsets = np.zeros(len(names) + 1, dtype='int64')
+    np.cumsum(lengths, out=offsets[1:])
+    return np.frombuffer(blob, dtype='uint8'), offsets
+
+
+def frame_columns(df):
+    """The sidecar arrays for a parsed (or records-derived) DataFrame."""
+    names = df[NAME_COL].to_numpy(dtype=object, na_value='')
+    codes, types = pd.factorize(df[TYPE_COL])
+    keys = pd.util.hash_array(names, categorize=False)
+    blob, offsets = _name_blob(names)
+    columns = {col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64') for col in METRIC_COLS}
+    columns.update(
+        type_codes=codes.astype('int32'),
+        types=np.array([str(t) for t in types], dtype=str),
+        name_keys=keys,
+        name_order=np.argsort(keys, kind='stable'),
+        name_offsets=offsets,
+        name_blob=blob,
+        fields=np.array([str(col) for col in df.columns], dtype=str),
+    )
+    return columns
+
+
+def records_columns(records):
+    """frame_columns() for raw_data_json records, for datasets stored without a sidecar."""
+    columns = frame_columns(pd.DataFrame.from_records(records, columns=REQUIRED_COLS))
+    if records:
+        columns['fields'] = np.array(list(records[0]), dtype=str)
+    return columns
+
+
+def covers_records(columns):
+    """Whether page_records() can stand in for raw_data_json (no extra CSV columns were stored)."""
+    fields = columns.get('fields')
+    return fields is not None and sorted(map(str, fields)) == sorted(REQUIRED_COLS)
+
+
+def page_records(columns, start, stop):
+    """raw_data_json[start:stop] rebuilt from the arrays; requires covers_records()."""
+    offsets = np.asarray(columns['name_offsets'][start:stop + 1])
+    blob = bytes(columns['name_blob'][offsets[0]:offsets[-1]]) if len(offsets) else b''
+    bounds = (offsets - offsets[0]).tolist() if len(offsets) else []
+    values = {
+        NAME_COL: [blob[a:b].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])],
+        TYPE_COL: [None if code < 0 else str(columns['types'][code])
+                   for code in columns['type_codes'][start:stop].tolist()],
+    }
+    for col in METRIC_COLS:
+        values[col] = [None if v != v else v for v in columns[col][start:stop].tolist()]  # NaN -> null
+    fields = [str(field) for field in columns['fields']]
+    return [dict(zip(fields, row)) for row in zip(*(values[field] for field in fields))]
+
+
+def _columns_path(dataset_id):
+    from django.conf import settings
+    return os.path.join(settings.DATASET_COLUMNS_DIR, str(dataset_id))
+
+
+def write_columns(dataset_id, columns):
+    path = _columns_path(dataset_id)
+    tmp_path = path + '.tmp'
+    os.makedirs(tmp_path, exist_ok=True)
+    for key, values in columns.items():
+        np.save(os.path.join(tmp_path, f'{key}.npy'), values)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def load_columns(dataset_id):
+    """The dataset's arrays, memory-mapped, or None if it was stored without a sidecar."""
+    path = _columns_path(dataset_id)
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return None
+    return {name[:-len('.npy')]: np.load(os.path.join(path, name), mmap_mode='r')
+            for name in names if name.endswith('.npy')}
+
+
+def delete_columns(dataset_ids):
+    for dataset_id in dataset_ids:
+        shutil.rmtree(_columns_path(dataset_id), ignore_errors=True)
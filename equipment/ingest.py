@@ -0,0 +1,115 @@
+"""
+Ingestion pipeline shared by /api/upload/, chunked uploads and `manage.py ingest`.
+
+prepare_csv() is pure CPU work and safe to run in worker processes: this module
+does not import Django models at import time, so pool workers started with
+`spawn` can unpickle it without a configured app registry.
+"""
+import json
+
+from .analytics import build_summary
+from .columns import frame_columns
+from .metrics import record_bytes, record_rows, stage
+from .parsing import CSVFormatError, read_equipment_csv
+
+# Datasets kept in the registry; older uploads are pruned after every write
+HISTORY_LIMIT = 5
+
+
+class EmptyDatasetError(CSVFormatError):
+    """Every row of the upload was quarantined."""
+
+    def __init__(self, quarantine):
+        super().__init__("No valid rows found")
+        self.quarantine = quarantine
+
+
+class EncodedJSON(str):
+    """raw_data already serialised to JSON text, e.g. by a pool worker."""
+
+
+def encode_rows(raw_data):
+    """Serialise raw_data for store_datasets() so the writer does not have to."""
+    return EncodedJSON(json.dumps(raw_data))
+
+
+def parse_csv(source, size=0):
+    """
+    The parse and validate stages of prepare_csv(): returns (df, quarantine).
+
+    Raises CSVFormatError for files that cannot be read and EmptyDatasetError
+    when no row survives validation.
+    """
+    # Parse CSV with the typed profile; malformed rows are quarantined
+    with stage('parse'):
+        df, quarantine = read_equipment_csv(source)
+    record_bytes('parse', size)
+    record_rows('parse', len(df) + len(quarantine))
+
+    with stage('validate'):
+        if df.empty:
+            raise EmptyDatasetError(quarantine)
+    return df, quarantine
+
+
+def prepare_csv(source, size=0):
+    """
+    Parse, validate and summarise one CSV without touching the database.
+
+    Returns (summary, raw_data, quarantine, columns), where `columns` are the
+    arrays of the dataset's columnar sidecar (see columns.py). Raises like
+    parse_csv().
+    """
+    df, quarantine = parse_csv(source, size)
+
+    # Perform Analytics
+    with stage('analytics'):
+        summary = build_summary(df)
+
+    # Prepare data for storage
+    with stage('to_dict'):
+        raw_data = df.to_dict('records')
+
+    with stage('columns'):
+        columns = frame_columns(df)
+
+    return summary, raw_data, quarantine, columns
+
+
+def store_datasets(items):
+    """
+    Write [(filename, summary, raw_data, columns), ...] in one transaction,
+    save each dataset's columnar sidecar, then prune history.
+
+    raw_data may be an EncodedJSON string, which is stored as-is.
+    """
+    from django.db import models, transaction
+    from django.db.models.functions import Cast
+    from .cache import invalidate_datasets, invalidate_history
+    from .columns import delete_columns, write_columns
+    from .models import EquipmentDataset
+
+    def rows_value(raw_data):
+        if isinstance(raw_data, EncodedJSON):
+            return Cast(models.Value(str(raw_data), output_field=models.TextField()), output_field=models.JSONField())
+        return raw_data
+
+    with stage('db_write'):
+        with transaction.atomic():
+            entries = EquipmentDataset.objects.bulk_create([
+                EquipmentDataset(filename=filename, summary_json=summary, raw_data_json=rows_value(raw_data))
+                for filename, summary, raw_data, _ in items
+            ])
+        for entry, item in zip(entries, items):
+            write_columns(entry.id, item[3])
+    invalidate_history()
+
+    # Maintain history: Delete entries older than the last HISTORY_LIMIT
+    with stage('prune'):
+        ids_to_keep = EquipmentDataset.objects.order_by('-upload_date').values_list('id', flat=True)[:HISTORY_LIMIT]
+        stale_ids = list(EquipmentDataset.objects.exclude(id__in=list(ids_to_keep)).values_list('id', flat=True))
+        if stale_ids:
+            EquipmentDataset.objects.filter(id__in=stale_ids).delete()
+            delete_columns(stale_ids)
+            invalidate_datasets(stale_ids)
+    return entries
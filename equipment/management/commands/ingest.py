@@ -0,0 +1,175 @@
+import glob
+import hashlib
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from equipment.ingest import HISTORY_LIMIT, encode_rows, parse_csv, prepare_csv, store_datasets
+
+
+def _read_file(path):
+    """(content, sha256 hex digest) of the file, or raises OSError."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    return content, hashlib.sha256(content).hexdigest()
+
+
+def _check_file(path):
+    """
+    Worker: read, digest and validate one CSV.
+
+    Returns (path, size, digest, (rows, quarantined count), error); exactly one
+    of the last two is set. Only these few values are pickled back to the
+    parent, since all but the last HISTORY_LIMIT files are never written.
+    """
+    try:
+        content, digest = _read_file(path)
+    except OSError as e:
+        return path, 0, None, None, str(e)
+    try:
+        df, quarantine = parse_csv(io.BytesIO(content), len(content))
+        return path, len(content), digest, (len(df), len(quarantine)), None
+    except Exception as e:
+        return path, len(content), digest, None, str(e)
+
+
+def _prepare_file(path):
+    """
+    Worker: prepare and JSON-encode one CSV for writing.
+
+    Returns (path, digest, prepared, error), where `prepared` is (summary,
+    encoded raw_data, columns). Encoding here keeps the writer's per-dataset
+    work small.
+    """
+    try:
+        content, digest = _read_file(path)
+        summary, raw_data, _, columns = prepare_csv(io.BytesIO(content), len(content))
+        return path, digest, (summary, encode_rows(raw_data), columns), None
+    except Exception as e:
+        return path, None, None, str(e)
+
+
+def _in_order(pool, func, items, window):
+    """func(item) for every item on `pool`, yielded in input order with at most `window` in flight."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def expand_paths(patterns):
+    """Files, directories (their *.csv) and glob patterns, in a stable order without repeats."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '*.csv'))
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        paths.extend(sorted(p for p in matches if os.path.isfile(p)))
+    return list(dict.fromkeys(paths))
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest a backfill of equipment CSVs. A process pool validates every file, taking results "
+        "in input order. Files with identical content are stored once. The registry keeps the "
+        f"latest {HISTORY_LIMIT} datasets, as for uploads, so only the last {HISTORY_LIMIT} files "
+        "that validate are then prepared and written, in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="CSV files, directories or glob patterns (quote `**` globs)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Parser processes (default: CPU count; 1 runs inline)")
+
+    def handle(self, *args, **options):
+        paths = expand_paths(options['paths'])
+        if not paths:
+            raise CommandError("No CSV files matched")
+        workers = max(1, options['workers'])
+
+        self.verbosity = options['verbosity']
+        self.validated = self.stored = self.superseded = self.rows = self.bytes = self.duplicates = 0
+        self.failures = []
+        self.seen = set()
+        # (path, digest) of the latest valid files; anything older would be pruned right after its write
+        self.survivors = deque()
+        start = time.perf_counter()
+
+        if workers == 1:
+            for result in map(_check_file, paths):
+                self.collect(result)
+            prepared = list(map(_prepare_file, [path for path, _ in self.survivors]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Consumed in submission order so duplicates, survivors and upload_date follow the input
+                for result in _in_order(pool, _check_file, paths, workers * 2):
+                    self.collect(result)
+                prepared = list(pool.map(_prepare_file, [path for path, _ in self.survivors]))
+        self.write(prepared)
+        elapsed = time.perf_counter() - start
+
+        for path, error in self.failures:
+            self.stderr.write(f"FAILED {path}: {error}")
+        self.stdout.write(
+            f"{len(paths)} files in {elapsed:.2f}s with {workers} worker(s): {self.validated} valid, "
+            f"{self.stored} stored, {self.superseded} superseded by the {HISTORY_LIMIT}-dataset retention, "
+            f"{self.duplicates} duplicate, {len(self.failures)} failed"
+        )
+        if elapsed:
+            self.stdout.write(
+                f"throughput: {len(paths) / elapsed:.1f} files/s, {self.rows / elapsed:,.0f} rows/s, "
+                f"{self.bytes / elapsed / 1e6:.1f} MB/s"
+            )
+        if self.failures:
+            raise CommandError(f"{len(self.failures)} file(s) failed to ingest")
+
+    def collect(self, result):
+        path, size, digest, counts, error = result
+        self.bytes += size
+        if error is not None:
+            self.failures.append((path, error))
+            return
+        if digest in self.seen:
+            self.duplicates += 1
+            return
+        self.seen.add(digest)
+        rows, quarantined = counts
+        if quarantined and self.verbosity >= 2:
+            self.stdout.write(f"{path}: {quarantined} cell(s) quarantined")
+        self.validated += 1
+        self.rows += rows
+        self.survivors.append((path, digest))
+        if len(self.survivors) > HISTORY_LIMIT:
+            self.survivors.popleft()
+            self.superseded += 1
+
+    def write(self, prepared):
+        items = []
+        for (path, expected), (_, digest, payload, error) in zip(self.survivors, prepared):
+            if error is None and digest != expected:
+                error = "file changed during ingest"
+            if error is not None:
+                self.failures.append((path, error))
+                continue
+            summary, raw_data, columns = payload
+            items.append((os.path.basename(path), summary, raw_data, columns))
+        if not items:
+            return
+        try:
+            store_datasets(items)
+        except Exception as e:
+            self.failures.extend((item[0], f"write failed: {e}") for item in items)
+            return
+        finally:
+            # With DEBUG on, every INSERT's full SQL would otherwise accumulate in connection.queries
+            reset_queries()
+        self.stored = len(items)
@@ -0,0 +1,206 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Deliberately free of Django imports so the desktop client can share the same
+stage timers (see desktop_app.py).
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+
+# Per-request scratchpad filled by stage() and record_rows(); owned by MetricsMiddleware
+_request_context = contextvars.ContextVar('equipiq_request_metrics', default=None)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = [(k, str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')) for k, v in pairs]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def _format_float(value):
+    return '+Inf' if value == float('inf') else repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_float(value)}']
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self._callback is not None:
+            self.set(self._callback())
+        return super().render()
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_float(value)}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.last = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+            self.last[key] = value
+
+    def snapshot(self):
+        """{label values: (last, mean, count)} for on-screen display."""
+        with self._lock:
+            return {key: (self.last[key], state[1] / state[2], state[2]) for key, state in self._values.items()}
+
+    def _render_value(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state[0]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ('le', _format_float(bound)))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_float(state[1])}')
+        lines.append(f'{self.name}_count{labels} {state[2]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'equipiq_stage_seconds', 'Wall time per instrumented hot-path stage.', ['stage'])
+ROWS_PROCESSED = REGISTRY.counter(
+    'equipiq_rows_processed_total', 'Rows handled by instrumented stages.', ['stage'])
+BYTES_PROCESSED = REGISTRY.counter(
+    'equipiq_bytes_processed_total', 'Input bytes handled by instrumented stages.', ['stage'])
+
+
+@contextmanager
+def stage(name):
+    """Time a block under equipiq_stage_seconds{stage=name} and the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        context = _request_context.get()
+        if context is not None:
+            context['stages'].append((name, elapsed))
+
+
+def timed(name):
+    """Decorator form of stage()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_rows(stage_name, count):
+    ROWS_PROCESSED.inc(count, stage=stage_name)
+    context = _request_context.get()
+    if context is not None:
+        context['rows'] += count
+
+
+def record_bytes(stage_name, count):
+    BYTES_PROCESSED.inc(count, stage=stage_name)
+
+
+def begin_request():
+    """Start collecting per-request stage timings; returns a token for end_request()."""
+    return _request_context.set({'stages': [], 'rows': 0})
+
+
+def end_request(token):
+    context = _request_context.get()
+    _request_context.reset(token)
+    return context
@@ -0,0 +1,159 @@
+import cProfile
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+
+from .metrics import REGISTRY, SIZE_BUCKETS, begin_request, end_request
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'equipiq_request_seconds', 'End-to-end request latency.', ['view', 'method', 'status'])
+REQUEST_BYTES = REGISTRY.counter(
+    'equipiq_request_bytes_total', 'Request body bytes received.', ['view'])
+REQUEST_ROWS = REGISTRY.histogram(
+    'equipiq_request_rows', 'CSV rows processed per request.', ['view'],
+    buckets=(10, 100, 1e3, 1e4, 1e5, 1e6, 1e7))
+REQUEST_DB_QUERIES = REGISTRY.histogram(
+    'equipiq_request_db_queries', 'Database queries issued per request (default connection).', ['view'],
+    buckets=(0, 1, 2, 5, 10, 25, 100))
+REQUEST_PEAK_MEMORY = REGISTRY.histogram(
+    'equipiq_request_peak_memory_bytes', 'Peak traced Python allocations per request (METRICS_TRACE_MEMORY).',
+    ['view'], buckets=SIZE_BUCKETS)
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+REGISTRY.gauge('equipiq_process_peak_rss_bytes', 'Process resident set size high-water mark.',
+               callback=_peak_rss_bytes)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, rows, bytes, DB queries and (optionally) peak memory for every request,
+    adds a Server-Timing header with the per-stage breakdown, and runs an opt-in
+    profiler when the request carries `X-Profile: cprofile` or `X-Profile: pyinstrument`.
+
+    Peak memory uses tracemalloc, which is process-wide: with concurrent
+    requests the figure is an upper bound for each of them.
+
+    Profiling is off unless METRICS_PROFILING_ENABLED is set. Any other
+    X-Profile value, or pyinstrument when it is not installed, is answered
+    with 400, and only the newest METRICS_PROFILE_KEEP profiles are kept.
+    """
+
+    PROFILERS = ('cprofile', 'pyinstrument')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.trace_memory = getattr(settings, 'METRICS_TRACE_MEMORY', False)
+        self.profiling_enabled = getattr(settings, 'METRICS_PROFILING_ENABLED', False)
+        self.profile_dir = getattr(settings, 'METRICS_PROFILE_DIR', None)
+        self.profile_keep = getattr(settings, 'METRICS_PROFILE_KEEP', 50)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def __call__(self, request):
+        mode = request.headers.get('X-Profile', '').lower() if self.profiling_enabled else ''
+        if mode not in ('',) + self.PROFILERS:
+            return JsonResponse({"error": f"X-Profile must be one of: {', '.join(self.PROFILERS)}"}, status=400)
+        if mode == 'pyinstrument' and pyinstrument is None:
+            return JsonResponse({"error": "pyinstrument is not installed"}, status=400)
+
+        token = begin_request()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                if mode:
+                    response, profile_path = self._profiled(request, mode)
+                else:
+                    response, profile_path = self.get_response(request), None
+        finally:
+            elapsed = time.perf_counter() - start
+            context = end_request(token)
+
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unmatched'
+        REQUEST_SECONDS.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        REQUEST_BYTES.inc(int(request.META.get('CONTENT_LENGTH') or 0), view=view)
+        REQUEST_DB_QUERIES.observe(queries[0], view=view)
+        if context['rows']:
+            REQUEST_ROWS.observe(context['rows'], view=view)
+        if self.trace_memory:
+            REQUEST_PEAK_MEMORY.observe(tracemalloc.get_traced_memory()[1], view=view)
+
+        timings = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in context['stages']]
+        timings.append(f'total;dur={elapsed * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+        if profile_path:
+            response['X-Profile-File'] = profile_path
+        return response
+
+    def _profiled(self, request, mode):
+        profile_dir = self.profile_dir or os.path.join(settings.BASE_DIR, 'profiles')
+        os.makedirs(profile_dir, exist_ok=True)
+        now = time.time()
+        timestamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now % 1 * 1e6):06d}"
+        stem = os.path.join(profile_dir, f"{timestamp}-{uuid.uuid4().hex[:8]}")
+
+        try:
+            if mode == 'pyinstrument':
+                profiler = pyinstrument.Profiler()
+                profiler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.stop()
+                path = stem + '.html'
+                with open(path, 'w') as f:
+                    f.write(profiler.output_html())
+                return response, path
+
+            profiler = cProfile.Profile()
+            try:
+                response = profiler.runcall(self.get_response, request)
+            finally:
+                path = stem + '.prof'
+                profiler.dump_stats(path)
+            return response, path
+        finally:
+            self._rotate_profiles(profile_dir)
+
+    def _rotate_profiles(self, profile_dir):
+        """Delete all but the newest `profile_keep` profiles."""
+        # Names start with the timestamp, so they sort oldest first
+        names = sorted(name for name in os.listdir(profile_dir) if name.endswith(('.prof', '.html')))
+        for name in names[:max(len(names) - self.profile_keep, 0)]:
+            try:
+                os.remove(os.path.join(profile_dir, name))
+            except OSError:
+                pass  # already removed by a concurrent request
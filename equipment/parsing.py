@@ -0,0 +1,168 @@
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from .analytics import NAME_COL, TYPE_COL, METRIC_COLS, REQUIRED_COLS
+
+try:
+    import pyarrow  # noqa: F401
+    DEFAULT_ENGINE = 'pyarrow'
+except ImportError:
+    DEFAULT_ENGINE = 'c'
+
+# Quarantine entries echoed back to clients; the full count is always reported
+QUARANTINE_PREVIEW = 100
+
+
+class CSVFormatError(ValueError):
+    """The upload could not be read as an equipment CSV at all."""
+
+
+def csv_dtypes(float_dtype='float64'):
+    """Explicit dtypes for the documented CSV schema (see README data contract)."""
+    dtypes = {NAME_COL: 'string', TYPE_COL: 'category'}
+    dtypes.update({col: float_dtype for col in METRIC_COLS})
+    return dtypes
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def _read_skipping_bad_lines(source, dtypes, engine):
+    """
+    pd.read_csv that drops rows with the wrong number of fields instead of failing.
+
+    Returns (df, skipped). The engines disagree on which rows those are: pyarrow
+    drops every row whose field count differs from the header's, while the c
+    and python engines only drop rows with too many fields and pad short ones
+    with NaN. The c engine cannot report bad lines to a callable, so only files
+    that have them are re-read with the python engine.
+    """
+    skipped = []
+    if engine == 'pyarrow':
+        df = pd.read_csv(source, dtype=dtypes, engine=engine,
+                         on_bad_lines=lambda row: skipped.append(row.actual_columns) or 'skip')
+        return df, skipped
+    try:
+        return pd.read_csv(source, dtype=dtypes, engine=engine), skipped
+    except pd.errors.ParserError:
+        _rewind(source)
+    df = pd.read_csv(source, dtype=dtypes, engine='python',
+                     on_bad_lines=lambda fields: skipped.append(len(fields)))
+    return df, skipped
+
+
+def _physical_lines(source, indices, field_count=None, short_rows_skipped=False):
+    """
+    ({data row index: 1-based line in the file where that row starts}, [(line, fields) of skipped rows]).
+
+    pandas skips blank (and whitespace-only) lines and lets quoted fields span
+    lines, so row indices are re-counted with the csv module. Only runs when
+    something was quarantined, and stops at the last index needed unless rows
+    with the wrong number of fields were skipped (pass the header's
+    `field_count`), which are located over the whole file.
+    """
+    wanted = set(indices)
+    lines = {}
+    skipped = []
+    if isinstance(source, (str, os.PathLike)):
+        stream, close = open(source, newline='', encoding='utf-8', errors='replace'), True
+    else:
+        _rewind(source)
+        stream, close = io.TextIOWrapper(source, encoding='utf-8', errors='replace', newline=''), False
+    try:
+        reader = csv.reader(stream)
+        next(reader, None)  # header
+        index, previous = 0, reader.line_num
+        for record in reader:
+            start, previous = previous + 1, reader.line_num
+            if not record or (len(record) == 1 and not record[0].strip()):
+                continue
+            if field_count is not None and (len(record) > field_count
+                                            or short_rows_skipped and len(record) < field_count):
+                skipped.append((start, len(record)))
+                continue
+            if index in wanted:
+                lines[index] = start
+                if len(lines) == len(wanted) and field_count is None:
+                    break
+            index += 1
+    finally:
+        if close:
+            stream.close()
+        else:
+            stream.detach()  # leave the caller's binary stream open
+    return lines, skipped
+
+
+def read_equipment_csv(source, float_dtype='float64', engine=None):
+    """
+    Parse an equipment CSV with the typed profile.
+
+    Returns (df, quarantine). Clean files take a single typed pass. If a
+    numeric cell cannot be cast, the file is re-read with the metric columns
+    as text. Rows with a missing name or Type, or a missing, non-numeric or
+    non-finite metric are moved to `quarantine` (one entry per bad cell,
+    `line` is the 1-based line in the file) and the remaining rows are kept,
+    so the returned frame never holds NaN. Rows with the wrong number of
+    fields get one entry for the whole row (`column` is None).
+    """
+    engine = engine or DEFAULT_ENGINE
+    try:
+        df, skipped = _read_skipping_bad_lines(source, csv_dtypes(float_dtype), engine)
+    except ValueError:
+        _rewind(source)
+        text_dtypes = dict(csv_dtypes(float_dtype), **{col: 'string' for col in METRIC_COLS})
+        try:
+            df, skipped = _read_skipping_bad_lines(source, text_dtypes, engine)
+        except ValueError as exc:
+            raise CSVFormatError(str(exc)) from exc
+
+    missing = [col for col in REQUIRED_COLS if col not in df.columns]
+    if missing:
+        raise CSVFormatError(f"Invalid CSV format. Required columns: {', '.join(REQUIRED_COLS)}")
+
+    bad_cells = []  # (row index, column, value, reason)
+    bad_rows = df[NAME_COL].isna() | df[TYPE_COL].isna()
+    for idx in df.index[df[NAME_COL].isna()]:
+        bad_cells.append((idx, NAME_COL, None, "missing equipment name"))
+    for idx in df.index[df[TYPE_COL].isna()]:
+        bad_cells.append((idx, TYPE_COL, None, "missing type"))
+
+    for col in METRIC_COLS:
+        raw = df[col]
+        if raw.dtype == float_dtype:
+            parsed, missing, unparsable = raw, raw.isna(), None
+        else:
+            parsed = pd.to_numeric(raw, errors='coerce').astype(float_dtype)
+            missing, unparsable = raw.isna(), parsed.isna() & raw.notna()
+            df[col] = parsed
+        infinite = pd.Series(np.isinf(parsed.to_numpy()), index=df.index)
+        for idx in df.index[missing]:
+            bad_cells.append((idx, col, None, "missing value"))
+        if unparsable is not None:
+            for idx, value in raw[unparsable].items():
+                bad_cells.append((idx, col, str(value), "not a number"))
+            bad_rows |= unparsable
+        for idx, value in parsed[infinite].items():
+            bad_cells.append((idx, col, str(value), "not a finite number"))
+        bad_rows |= missing | infinite
+
+    quarantine = []
+    if bad_rows.any() or skipped:
+        field_count = len(df.columns) if skipped else None
+        lines, skipped_lines = _physical_lines(source, {int(cell[0]) for cell in bad_cells}, field_count,
+                                               short_rows_skipped=engine == 'pyarrow')
+        quarantine = [{"line": lines.get(int(idx), int(idx) + 2), "column": col, "value": value, "reason": reason}
+                      for idx, col, value, reason in bad_cells]
+        quarantine += [{"line": line, "column": None, "value": f"{fields} fields, expected {field_count}",
+                        "reason": "wrong field count"} for line, fields in skipped_lines]
+        quarantine.sort(key=lambda entry: entry['line'])
+        df = df[~bad_rows.to_numpy()].reset_index(drop=True)
+        df[TYPE_COL] = df[TYPE_COL].cat.remove_unused_categories()
+    return df, quarantine
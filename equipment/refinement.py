@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from .ingest import EmptyDatasetError, prepare_csv, store_datasets
+from .parsing import QUARANTINE_PREVIEW
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _refine_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.SKETCH_REFINE_WORKERS,
+                                           thread_name_prefix='equipiq-refine')
+        return _executor
+
+
+def _process_start(pid):
+    """Start time of process `pid` in clock ticks since boot (Linux), or None if unknown."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return int(f.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _current_owner():
+    return {"host": socket.gethostname(), "pid": os.getpid(), "processStart": _process_start(os.getpid())}
+
+
+def _owner_alive(owner):
+    """False only when the process that queued a job provably no longer exists."""
+    if not owner or owner.get('host') != socket.gethostname() or os.name != 'posix':
+        return True  # cannot tell; the job expires after SKETCH_JOB_EXPIRY_SECONDS
+    try:
+        os.kill(owner['pid'], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # alive, owned by another user
+    started = owner.get('processStart')
+    return started is None or _process_start(owner['pid']) in (None, started)  # a reused pid starts later
+
+
+class RefinementJob:
+    """
+    A sketch-mode upload whose exact ingestion runs in the background.
+
+    Layout under SKETCH_JOB_DIR/<job_id>/:
+        data.csv      the uploaded bytes; removed once refinement finishes
+        status.json   filename, state, preliminary statistics and, when done,
+                      the stored dataset's id and exact summary
+
+    State lives on disk so any server process can answer status polls. The
+    exact ingestion runs on the thread pool of the process that accepted the
+    upload, recorded as `owner`; a job whose owner has exited (a server
+    restart) is marked failed when it is next loaded or purged.
+    """
+
+    SKETCHING = 'sketching'
+    REFINING = 'refining'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.path = os.path.join(settings.SKETCH_JOB_DIR, job_id)
+        self.data_path = os.path.join(self.path, 'data.csv')
+        self.status_path = os.path.join(self.path, 'status.json')
+        with open(self.status_path) as f:
+            self.state = json.load(f)
+
+    @classmethod
+    def create(cls, filename, source=None, source_path=None):
+        """Take ownership of the upload: `source_path` is moved into the job, `source` is copied."""
+        cls.purge_expired()
+        job_id = str(uuid.uuid4())
+        path = os.path.join(settings.SKETCH_JOB_DIR, job_id)
+        os.makedirs(path)
+        data_path = os.path.join(path, 'data.csv')
+        if source_path is not None:
+            shutil.move(source_path, data_path)  # a rename unless the upload temp dir is on another filesystem
+        else:
+            with open(data_path, 'wb') as f:
+                shutil.copyfileobj(source, f)
+        with open(os.path.join(path, 'status.json'), 'w') as f:
+            json.dump({"jobId": job_id, "filename": os.path.basename(filename), "state": cls.SKETCHING,
+                       "created": time.time(), "owner": _current_owner()}, f)
+        return cls(job_id)
+
+    @classmethod
+    def load(cls, job_id):
+        """Return the job, or None if it is unknown or expired."""
+        try:
+            job = cls(job_id)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        job._fail_if_orphaned()
+        return job
+
+    @classmethod
+    def purge_expired(cls):
+        root = settings.SKETCH_JOB_DIR
+        if not os.path.isdir(root):
+            return
+        cutoff = time.time() - settings.SKETCH_JOB_EXPIRY_SECONDS
+        for name in os.listdir(root):
+            status_path = os.path.join(root, name, 'status.json')
+            try:
+                expired = os.path.getmtime(status_path) < cutoff
+            except OSError:
+                expired = True
+            if expired:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            else:
+                cls.load(name)  # frees data.csv of jobs orphaned by a restart
+
+    def _save(self, **changes):
+        self.state.update(changes)
+        tmp_path = self.status_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, default=str)
+        os.replace(tmp_path, self.status_path)
+
+    def _fail_if_orphaned(self):
+        if self.state['state'] in (self.SKETCHING, self.REFINING) and not _owner_alive(self.state.get('owner')):
+            self._save(state=self.FAILED, error="The server restarted before refinement finished; upload the file again")
+            if os.path.exists(self.data_path):
+                os.remove(self.data_path)
+
+    def start(self, preliminary):
+        """Publish the preliminary statistics and queue the exact ingestion."""
+        self._save(state=self.REFINING, preliminary=preliminary)
+        _refine_executor().submit(self._refine)
+
+    def _refine(self):
+        try:
+            with open(self.data_path, 'rb') as source:
+                summary, raw_data, quarantine, columns = prepare_csv(source, os.path.getsize(self.data_path))
+            entry, = store_datasets([(self.state['filename'], summary, raw_data, columns)])
+            self._save(state=self.DONE, result={
+                "id": entry.id,
+                "summary": summary,
+                "quarantinedCount": len(quarantine),
+                "quarantine": quarantine[:QUARANTINE_PREVIEW]
+            })
+        except EmptyDatasetError as e:
+            self._save(state=self.FAILED, error=str(e), result={"quarantinedCount": len(e.quarantine)})
+        except Exception as e:
+            self._save(state=self.FAILED, error=str(e))
+        finally:
+            if os.path.exists(self.data_path):
+                os.remove(self.data_path)
+            # Worker threads get their own DB connections; don't leak them
+            connections.close_all()
+
+    def discard(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def status(self):
+        return {key: value for key, value in self.state.items() if key not in ('created', 'owner')}
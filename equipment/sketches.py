@@ -0,0 +1,303 @@
+"""
+Sketch-based preliminary statistics for very large uploads.
+
+sketch_csv() reads newline-aligned byte blocks of the file in random order
+until a time budget runs out, so the rows seen form a random cluster sample of
+the whole file rather than a prefix. From those rows it keeps:
+
+* ReservoirSample - uniform row sample for the scatter plot
+* TDigest          - quantiles per metric
+* TypeCounter      - exact Type counts, switching to a count-min sketch past
+                     a cardinality limit
+
+Means and the row count are ratio estimates over blocks with 95% confidence
+half-widths from the Student t distribution with blocks - 1 degrees of
+freedom (see README "Sketch Mode" for the error bounds). Like the rest of
+the analytics code this module does not depend on Django.
+"""
+import io
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .analytics import NAME_COL, TYPE_COL, METRIC_COLS, REQUIRED_COLS, _round
+from .parsing import DEFAULT_ENGINE, CSVFormatError
+
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+# Two-sided 95% critical values of Student's t for 1..30 degrees of freedom
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+Z_95 = 1.959964
+
+
+def t_critical_95(df):
+    """Two-sided 95% critical value of Student's t with `df` degrees of freedom."""
+    if df <= len(T_95):
+        return T_95[df - 1]
+    # Cornish-Fisher expansion around the normal quantile; within 1e-4 past the table
+    z = Z_95
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+
+class ReservoirSample:
+    """Uniform sample of `size` rows: every row gets a random key and the smallest keys are kept."""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.rows = None
+        self.keys = np.empty(0)
+
+    def update(self, frame):
+        if frame.empty:
+            return
+        keys = np.concatenate([self.keys, self.rng.random(len(frame))])
+        rows = frame if self.rows is None else pd.concat([self.rows, frame], ignore_index=True)
+        if len(keys) > self.size:
+            keep = np.argpartition(keys, self.size)[:self.size]
+            keys, rows = keys[keep], rows.iloc[keep].reset_index(drop=True)
+        self.keys, self.rows = keys, rows
+
+    def records(self):
+        if self.rows is None:
+            return []
+        return self.rows.astype(object).where(self.rows.notna(), None).to_dict('records')
+
+
+class TDigest:
+    """
+    Merging t-digest with the k1 scale function.
+
+    Points are merged into centroids whose size shrinks towards both tails, so
+    extreme quantiles stay accurate with about `compression / 2` centroids.
+    Merging is vectorised: sorted points are binned by floor(k(q)).
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, np.ones(len(values))])
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        q_mid = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1))
+        groups = np.concatenate([[0], np.cumsum(np.diff(k) != 0)])
+        self.weights = np.bincount(groups, weights)
+        self.means = np.bincount(groups, weights * means) / self.weights
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def quantile(self, q):
+        if not len(self.weights):
+            return None
+        total = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * total, np.concatenate([[0], centers, [total]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+
+class TypeCounter:
+    """
+    Exact counts while cardinality stays at or below `exact_limit`, then a
+    count-min sketch (`depth` rows of `width` counters) that tracks the `top_k`
+    heaviest keys. Count-min estimates never undercount and overcount by at
+    most e / width * N with probability 1 - e^-depth.
+    """
+
+    # pandas hash_array requires 16-character keys; one per sketch row
+    HASH_KEYS = ('equipiq-cm-row-0', 'equipiq-cm-row-1', 'equipiq-cm-row-2', 'equipiq-cm-row-3',
+                 'equipiq-cm-row-4', 'equipiq-cm-row-5', 'equipiq-cm-row-6', 'equipiq-cm-row-7')
+
+    def __init__(self, exact_limit=1024, width=2048, depth=4, top_k=20):
+        self.exact_limit = exact_limit
+        self.width = width
+        self.depth = min(depth, len(self.HASH_KEYS))
+        self.top_k = top_k
+        self.counts = {}
+        self.table = None
+        self.total = 0
+
+    @property
+    def exact(self):
+        return self.table is None
+
+    def _buckets(self, keys):
+        keys = np.asarray(keys, dtype=object)
+        return [pd.util.hash_array(keys, hash_key=self.HASH_KEYS[d]) % self.width for d in range(self.depth)]
+
+    def _estimate(self, keys):
+        return np.min([self.table[d][b] for d, b in enumerate(self._buckets(keys))], axis=0)
+
+    def update(self, counts):
+        """Add a value_counts() Series."""
+        self.total += int(counts.sum())
+        if self.exact:
+            for key, count in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + int(count)
+            if len(self.counts) <= self.exact_limit:
+                return
+            counts = pd.Series(self.counts)
+            self.table = np.zeros((self.depth, self.width), dtype='int64')
+        keys = list(counts.index)
+        for d, buckets in enumerate(self._buckets(keys)):
+            np.add.at(self.table[d], buckets, counts.to_numpy())
+        candidates = list(dict.fromkeys(list(self.counts) + keys))
+        estimates = self._estimate(candidates)
+        top = np.argsort(-estimates, kind='stable')[:self.top_k]
+        self.counts = {candidates[i]: int(estimates[i]) for i in top}
+
+    def error_bound(self):
+        """Absolute overcount bound of the count-min estimates (0 while exact)."""
+        return 0 if self.exact else math.e / self.width * self.total
+
+
+def _read_block(f, start, end, data_start):
+    """Bytes of every line that starts in [start, end)."""
+    if start > data_start:
+        f.seek(start - 1)
+        if f.read(1) != b'\n':
+            f.readline()  # this line belongs to the previous block
+    else:
+        f.seek(start)
+    position = f.tell()
+    if position >= end:
+        return b''
+    data = f.read(end - position)
+    if data and not data.endswith(b'\n'):
+        data += f.readline()
+    return data
+
+
+def _block_frame(header, data):
+    df = pd.read_csv(io.BytesIO(header + data), dtype={NAME_COL: 'string', TYPE_COL: 'string'},
+                     engine=DEFAULT_ENGINE, on_bad_lines='skip')
+    for col in METRIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Same rows parsing.read_equipment_csv would quarantine: wrong field count,
+    # missing name or Type, missing, non-numeric or non-finite metric
+    metrics = df[METRIC_COLS].to_numpy(dtype='float64')
+    return df[(df[NAME_COL].notna() & df[TYPE_COL].notna()).to_numpy() & np.isfinite(metrics).all(axis=1)]
+
+
+def _ratio_estimate(numerators, denominators, sampling_fraction):
+    """Ratio of sums with a 95% half-width from the between-block residuals (None if unknown)."""
+    numerators, denominators = np.asarray(numerators, float), np.asarray(denominators, float)
+    ratio = numerators.sum() / denominators.sum()
+    blocks = len(numerators)
+    if sampling_fraction >= 1:
+        return ratio, 0.0
+    if blocks < 2:
+        return ratio, None
+    residuals = numerators - ratio * denominators
+    variance = (1 - sampling_fraction) * (residuals ** 2).sum() / (blocks - 1) / (blocks * denominators.mean() ** 2)
+    return ratio, t_critical_95(blocks - 1) * math.sqrt(variance)
+
+
+def sketch_csv(path, time_budget=2.0, block_bytes=4 * 1024 * 1024, sample_size=2000, compression=200, seed=0):
+    """
+    Preliminary statistics for the CSV at `path` within roughly `time_budget` seconds.
+
+    At least one block is always read; if every block is read within the
+    budget the figures are exact (`approximate` is False).
+    """
+    start_time = time.perf_counter()
+    size = os.path.getsize(path)
+    rng = np.random.default_rng(seed)
+    sample = ReservoirSample(sample_size, seed)
+    digests = {col: TDigest(compression) for col in METRIC_COLS}
+    types = TypeCounter()
+    block_rows, block_bytes_read, block_sums, block_types = [], [], {col: [] for col in METRIC_COLS}, []
+
+    with open(path, 'rb') as f:
+        header = f.readline()
+        try:
+            columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+        except ValueError as exc:
+            raise CSVFormatError(str(exc)) from exc
+        if any(col not in columns for col in REQUIRED_COLS):
+            raise CSVFormatError(f"Invalid CSV format. Required columns: {', '.join(REQUIRED_COLS)}")
+
+        data_start = f.tell()
+        total_blocks = max(1, -(-(size - data_start) // block_bytes))
+        for visited, block in enumerate(rng.permutation(total_blocks)):
+            if visited and time.perf_counter() - start_time > time_budget:
+                break
+            block_start = data_start + int(block) * block_bytes
+            data = _read_block(f, block_start, min(block_start + block_bytes, size), data_start)
+            df = _block_frame(header, data) if data else pd.DataFrame(columns=REQUIRED_COLS)
+
+            block_rows.append(len(df))
+            block_bytes_read.append(min(block_start + block_bytes, size) - block_start)
+            for col in METRIC_COLS:
+                block_sums[col].append(float(df[col].sum()))
+                digests[col].update(df[col].to_numpy())
+            type_counts = df[TYPE_COL].value_counts()
+            block_types.append(type_counts.to_dict())
+            if not df.empty:
+                types.update(type_counts)
+                sample.update(df[REQUIRED_COLS])
+
+    blocks_read = len(block_rows)
+    fraction = blocks_read / total_blocks
+    rows_seen = sum(block_rows)
+
+    # Rows per byte, scaled to the whole file
+    rows_per_byte, rows_per_byte_error = _ratio_estimate(block_rows, block_bytes_read, fraction)
+    data_bytes = max(size - data_start, 1)
+    total_count = rows_per_byte * data_bytes
+    summary = {"totalCount": int(round(total_count))}
+    bounds = {"confidence": 0.95,
+              "totalCount": None if rows_per_byte_error is None else round(rows_per_byte_error * data_bytes)}
+
+    for col in METRIC_COLS:
+        key = f"avg{col}"
+        if rows_seen:
+            mean, error = _ratio_estimate(block_sums[col], block_rows, fraction)
+            summary[key], bounds[key] = _round(mean), _round(error)
+        else:
+            summary[key], bounds[key] = None, None
+
+    scale = total_count / rows_seen if rows_seen else 0
+    ordered = sorted(types.counts.items(), key=lambda item: -item[1])
+    summary["typeDistribution"] = {str(k): int(round(v * scale)) for k, v in ordered}
+    if types.exact and rows_seen:
+        # Half-width of each Type's share of the fleet, from per-block counts
+        share_errors = [_ratio_estimate([counts.get(k, 0) for counts in block_types], block_rows, fraction)[1]
+                        for k in types.counts]
+        bounds["typeShare"] = None if None in share_errors else round(max(share_errors, default=0.0), 4)
+    else:
+        bounds["typeShare"] = None
+    bounds["typeCountMinOvercount"] = int(math.ceil(types.error_bound() * scale))
+
+    return {
+        "approximate": fraction < 1,
+        "coverage": round(sum(block_bytes_read) / data_bytes, 4),
+        "blocksRead": blocks_read,
+        "totalBlocks": total_blocks,
+        "elapsedSeconds": round(time.perf_counter() - start_time, 3),
+        "typeCounts": "exact" if types.exact else "countMin",
+        "summary": summary,
+        "errorBounds": bounds,
+        "quantiles": {col: {f"p{round(q * 100)}": _round(digests[col].quantile(q)) for q in QUANTILES}
+                      for col in METRIC_COLS},
+        "sample": sample.records(),
+    }
@@ -0,0 +1,391 @@
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .analytics import NAME_COL
+from .cache import HISTORY_BODY_KEY, BoundedLocMemCache, cached, dataset_cache, invalidate_history
+from .columns import delete_columns, load_columns
+from .ingest import HISTORY_LIMIT
+from .models import EquipmentDataset
+from .parsing import DEFAULT_ENGINE, read_equipment_csv
+from .refinement import RefinementJob
+from .sketches import _block_frame, _ratio_estimate
+
+SAMPLE_CSV = os.path.join(settings.BASE_DIR, 'sample_equipment_data.csv')
+
+
+def sample_csv():
+    with open(SAMPLE_CSV) as f:
+        return f.read()
+
+
+class UploadMixin:
+    def setUp(self):
+        super().setUp()
+        columns_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(columns_dir.cleanup)
+        override = self.settings(DATASET_COLUMNS_DIR=columns_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        dataset_cache().clear()
+
+    def upload(self, text, name='fleet.csv', url='/api/upload/', **extra):
+        payload = io.BytesIO(text.encode())
+        payload.name = name
+        return self.client.post(url, {'file': payload, **extra})
+
+
+class QuarantineTests(UploadMixin, TestCase):
+    def assertQuarantined(self, response, line, column, reason):
+        self.assertEqual(response.status_code, 201, response.content)
+        body = response.json()
+        self.assertEqual(body['summary']['totalCount'], 10)
+        self.assertEqual(body['quarantine'], [{"line": line, "column": column, "value": None, "reason": reason}])
+        stored = EquipmentDataset.objects.get(id=body['id']).raw_data_json
+        self.assertEqual(len(stored), 10)
+
+    def test_empty_metric_cell_is_quarantined(self):
+        response = self.upload(sample_csv() + "X3,Pump,,4,5\n")
+        self.assertQuarantined(response, 12, 'Flowrate', 'missing value')
+
+    def test_empty_type_cell_is_quarantined(self):
+        response = self.upload(sample_csv() + "X4,,1,2,3\n")
+        self.assertQuarantined(response, 12, 'Type', 'missing type')
+
+    def test_line_numbers_count_blank_lines(self):
+        response = self.upload(sample_csv() + "\n\nX5,Pump,abc,4,5\n")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['quarantine'],
+                         [{"line": 14, "column": 'Flowrate', "value": 'abc', "reason": 'not a number'}])
+
+    def test_row_with_too_many_fields_is_quarantined(self):
+        response = self.upload(sample_csv() + "A,Pump,1,2,3,4\n")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['quarantine'], [{"line": 12, "column": None, "value": '6 fields, expected 5',
+                                                          "reason": 'wrong field count'}])
+        self.assertEqual(response.json()['summary']['totalCount'], 10)
+
+    def test_wrong_field_counts_are_quarantined_by_every_engine(self):
+        text = sample_csv() + "A,Pump,1,2,3,4\n\nB,Pump,1,2,3\nC,Pump,1,2,3,4,5\n"
+        for engine in ('c', 'python', DEFAULT_ENGINE):
+            df, quarantine = read_equipment_csv(io.BytesIO(text.encode()), engine=engine)
+            self.assertEqual(list(df[NAME_COL])[-1], 'B', engine)
+            self.assertEqual([(entry['line'], entry['reason']) for entry in quarantine],
+                             [(12, 'wrong field count'), (15, 'wrong field count')], engine)
+
+
+class ChunkedUploadTests(UploadMixin, TestCase):
+    CHUNK_SIZE = 128
+
+    def setUp(self):
+        super().setUp()
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        override = self.settings(CHUNKED_UPLOAD_DIR=upload_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.data = sample_csv().encode()
+
+    def start(self, **fields):
+        fields = {"filename": 'fleet.csv', "size": len(self.data), "chunkSize": self.CHUNK_SIZE, **fields}
+        return self.client.post('/api/uploads/', fields)
+
+    def put_chunk(self, upload_id, index, data, checksum=None):
+        return self.client.put(f'/api/uploads/{upload_id}/chunks/{index}/', data,
+                               content_type='application/octet-stream',
+                               headers={"X-Chunk-Sha256": checksum or hashlib.sha256(data).hexdigest()})
+
+    def chunk(self, index):
+        return self.data[index * self.CHUNK_SIZE:(index + 1) * self.CHUNK_SIZE]
+
+    def send_all(self, upload_id):
+        for index in range(-(-len(self.data) // self.CHUNK_SIZE)):
+            self.assertEqual(self.put_chunk(upload_id, index, self.chunk(index)).status_code, 200)
+
+    def received(self, upload_id):
+        return self.client.get(f'/api/uploads/{upload_id}/').json()['receivedChunks']
+
+    def commit(self, upload_id):
+        return self.client.post(f'/api/uploads/{upload_id}/commit/')
+
+    def test_size_is_bounded(self):
+        for size in (0, -1, settings.CHUNKED_UPLOAD_MAX_SIZE + 1, 2 ** 80):
+            self.assertEqual(self.start(size=size).status_code, 400, size)
+
+    def test_chunks_are_verified(self):
+        upload_id = self.start().json()['uploadId']
+        self.assertEqual(self.put_chunk(upload_id, 0, self.chunk(0)[:-1]).status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 0, self.chunk(0), checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.received(upload_id), [])
+        self.assertEqual(self.put_chunk(upload_id, 0, self.chunk(0)).status_code, 200)
+        self.assertEqual(self.received(upload_id), [0])
+        # A re-sent chunk overwrites the verified bytes, so a bad one clears the marker
+        self.assertEqual(self.put_chunk(upload_id, 0, self.chunk(1)[:self.CHUNK_SIZE], checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.received(upload_id), [])
+
+    def test_incomplete_upload_cannot_be_committed(self):
+        upload_id = self.start().json()['uploadId']
+        self.put_chunk(upload_id, 1, self.chunk(1))
+        response = self.commit(upload_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['missingChunks'][:2], [0, 2])
+
+    def test_whole_file_checksum_is_verified(self):
+        upload_id = self.start(sha256=hashlib.sha256(b'other').hexdigest()).json()['uploadId']
+        self.send_all(upload_id)
+        self.assertEqual(self.commit(upload_id).status_code, 409)
+
+    def test_committed_upload_is_ingested_and_removed(self):
+        upload_id = self.start(sha256=hashlib.sha256(self.data).hexdigest()).json()['uploadId']
+        self.send_all(upload_id)
+        response = self.commit(upload_id)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['summary']['totalCount'], 10)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').status_code, 404)
+
+    def test_upload_is_kept_after_a_server_error(self):
+        upload_id = self.start().json()['uploadId']
+        self.send_all(upload_id)
+        with mock.patch('equipment.views.store_datasets', side_effect=RuntimeError("database is locked")):
+            self.assertEqual(self.commit(upload_id).status_code, 500)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').status_code, 200)
+        self.assertEqual(self.commit(upload_id).status_code, 201)
+
+
+class IngestCommandTests(UploadMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        backfill = tempfile.TemporaryDirectory()
+        self.addCleanup(backfill.cleanup)
+        self.dir = backfill.name
+        # Seven distinct files, a copy of the sixth and a file without the required columns
+        for n in range(7):
+            self.write(f'f{n}.csv', sample_csv() + f"Extra {n},Pump,{n},1,1\n")
+        self.write('f5b.csv', sample_csv() + "Extra 5,Pump,5,1,1\n")
+        self.write('z-bad.csv', "name,flow\nA,1\n")
+
+    def write(self, name, text):
+        with open(os.path.join(self.dir, name), 'w') as f:
+            f.write(text)
+
+    def ingest(self, workers):
+        out, err = io.StringIO(), io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('ingest', self.dir, '--workers', str(workers), stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_last_files_in_input_order_are_kept(self):
+        for workers in (1, 2):
+            out, err = self.ingest(workers)
+            stored = EquipmentDataset.objects.order_by('upload_date').values_list('filename', flat=True)
+            self.assertEqual(list(stored), ['f2.csv', 'f3.csv', 'f4.csv', 'f5.csv', 'f6.csv'], workers)
+            self.assertIn("7 valid, 5 stored, 2 superseded by the 5-dataset retention, 1 duplicate, 1 failed", out)
+            self.assertIn("z-bad.csv", err)
+            for dataset_id in EquipmentDataset.objects.values_list('id', flat=True):
+                self.assertIsNotNone(load_columns(dataset_id))
+
+    def test_clean_backfill_succeeds(self):
+        os.remove(os.path.join(self.dir, 'z-bad.csv'))
+        call_command('ingest', self.dir, '--workers', '1', stdout=io.StringIO())
+        self.assertEqual(EquipmentDataset.objects.count(), HISTORY_LIMIT)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = profile_dir.name
+
+    def get(self, profiler, **overrides):
+        with self.settings(METRICS_PROFILE_DIR=self.profile_dir, **overrides):
+            return self.client.get('/api/history/', headers={"X-Profile": profiler})
+
+    def test_profiling_is_off_by_default(self):
+        response = self.get('cprofile')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_unknown_profiler_is_rejected(self):
+        self.assertEqual(self.get('yappi', METRICS_PROFILING_ENABLED=True).status_code, 400)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_old_profiles_are_deleted(self):
+        paths = [self.get('cprofile', METRICS_PROFILING_ENABLED=True, METRICS_PROFILE_KEEP=2)['X-Profile-File']
+                 for _ in range(3)]
+        self.assertEqual(sorted(os.listdir(self.profile_dir)), sorted(map(os.path.basename, paths[1:])))
+
+
+class CompareTests(UploadMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        older = sample_csv() + "X1,Pump,10,1,1\nX2,Valve,5,1,1\n"
+        newer = sample_csv() + "X1,Pump,40,1,1\nX3,Tank,1,1,1\n"
+        self.ids = [self.upload(text).json()['id'] for text in (older, newer)]
+
+    def compare(self, **params):
+        query = '&'.join(f'{k}={v}' for k, v in params.items())
+        return self.client.get(f"/api/compare/?ids={','.join(map(str, self.ids))}&{query}")
+
+    def test_assets_are_matched_on_name(self):
+        body = self.compare().json()
+        self.assertEqual(body['fleet']['totalRows'], 24)
+        self.assertEqual(body['assetCount'], 13)
+        self.assertEqual(body['fleet']['commonAssets'], 11)
+        self.assertEqual(body['assets'][0], {"name": 'X1', "type": 'Pump', "presentIn": 2, "flowrateDelta": 30.0,
+                                             "pressureDelta": 0.0, "temperatureDelta": 0.0})
+
+    def test_limit_must_be_in_range(self):
+        for limit in (0, -3, 10 ** 6, 'abc'):
+            self.assertEqual(self.compare(limit=limit).status_code, 400, limit)
+        self.assertEqual(len(self.compare(limit=2).json()['assets']), 2)
+
+    def test_datasets_without_sidecar_are_compared_from_rows(self):
+        expected = self.compare().json()
+        delete_columns(self.ids)
+        dataset_cache().clear()
+        self.assertEqual(self.compare().json(), expected)
+        self.assertIsNotNone(load_columns(self.ids[0]))
+
+    def test_pruned_datasets_lose_their_sidecar(self):
+        for _ in range(HISTORY_LIMIT):
+            self.upload(sample_csv())
+        self.assertIsNone(load_columns(self.ids[0]))
+        self.assertEqual(self.compare().status_code, 404)
+
+
+class RowsTests(UploadMixin, TestCase):
+    def rows(self, dataset_id, page, page_size=4):
+        return self.client.get(f'/api/datasets/{dataset_id}/rows/?page={page}&pageSize={page_size}')
+
+    def assertPagesMatchStoredRows(self, dataset_id):
+        stored = EquipmentDataset.objects.get(id=dataset_id).raw_data_json
+        pages = [self.rows(dataset_id, page).json() for page in (1, 2, 3)]
+        self.assertEqual([row for body in pages for row in body['rows']], stored)
+        self.assertEqual(pages[0]['totalRows'], len(stored))
+        self.assertEqual(self.rows(dataset_id, 4).status_code, 404)
+
+    def test_pages_are_served_from_the_sidecar(self):
+        dataset_id = self.upload(sample_csv() + "Pompe \u00e9t\u00e9,Pump,1.5,2,3\n").json()['id']
+        EquipmentDataset.objects.filter(id=dataset_id).update(raw_data_json=[])
+        pages = [self.rows(dataset_id, page).json() for page in (1, 2, 3)]
+        self.assertEqual(pages[2]['rows'][-1], {"Equipment Name": 'Pompe \u00e9t\u00e9', "Type": 'Pump',
+                                                "Flowrate": 1.5, "Pressure": 2.0, "Temperature": 3.0})
+        self.assertEqual(sum(len(body['rows']) for body in pages), 11)
+
+    def test_pages_match_the_stored_rows(self):
+        self.assertPagesMatchStoredRows(self.upload(sample_csv()).json()['id'])
+
+    def test_extra_columns_are_paged_from_the_stored_rows(self):
+        lines = sample_csv().splitlines()
+        text = '\n'.join([lines[0] + ',Site'] + [line + ',North' for line in lines[1:]]) + '\n'
+        dataset_id = self.upload(text).json()['id']
+        self.assertEqual(self.rows(dataset_id, 1).json()['rows'][0]['Site'], 'North')
+        self.assertPagesMatchStoredRows(dataset_id)
+
+    def test_pages_of_datasets_without_sidecar(self):
+        dataset_id = self.upload(sample_csv()).json()['id']
+        delete_columns([dataset_id])
+        self.assertPagesMatchStoredRows(dataset_id)
+        self.assertIsNotNone(load_columns(dataset_id))
+
+
+class CacheTests(UploadMixin, TestCase):
+    def test_total_size_is_bounded(self):
+        cache = BoundedLocMemCache('equipiq-tests-bounded', {'OPTIONS': {'MAX_BYTES': 10_000}})
+        self.addCleanup(cache.clear)
+        for n in range(5):
+            cache.set(f'page:{n}', b'x' * 3000)
+        self.assertEqual([cache.get(f'page:{n}') is not None for n in range(5)], [False, False, True, True, True])
+        cache.get('page:2')
+        cache.set('page:5', b'x' * 3000)
+        self.assertIsNotNone(cache.get('page:2'))
+        self.assertIsNone(cache.get('page:3'))
+        cache.delete('page:2')
+        cache.set('page:6', b'x' * 6000)
+        self.assertEqual([cache.get(f'page:{n}') is not None for n in (4, 5, 6)], [False, True, True])
+
+    def test_value_computed_across_an_invalidation_is_not_stored(self):
+        def stale_listing():
+            invalidate_history()  # an upload lands while the listing is being built
+            return b'stale'
+
+        self.assertEqual(cached('history', HISTORY_BODY_KEY, stale_listing), b'stale')
+        self.assertIsNone(dataset_cache().get(HISTORY_BODY_KEY))
+        self.assertEqual(cached('history', HISTORY_BODY_KEY, lambda: b'fresh'), b'fresh')
+        self.assertEqual(dataset_cache().get(HISTORY_BODY_KEY), b'fresh')
+
+    def test_registry_changes_from_other_processes_are_seen(self):
+        ids = [self.upload(sample_csv()).json()['id'] for _ in range(2)]
+        self.assertEqual(self.client.get(f"/api/compare/?ids={ids[0]},{ids[1]}").status_code, 200)
+        self.client.get('/api/history/')
+        # Written and pruned through the ORM, as `manage.py ingest` in another process would
+        added = EquipmentDataset.objects.create(filename='other.csv', summary_json={}, raw_data_json=[])
+        EquipmentDataset.objects.filter(id=ids[0]).delete()
+        history = self.client.get('/api/history/').json()['history']
+        self.assertEqual([entry['id'] for entry in history], [added.id, ids[1]])
+        self.assertEqual(self.client.get(f'/api/datasets/{added.id}/').status_code, 200)
+        self.assertEqual(self.client.get(f"/api/compare/?ids={ids[0]},{ids[1]}").status_code, 404)
+
+    def test_history_reflects_upload_after_cached_listing(self):
+        self.upload(sample_csv())
+        self.assertEqual(len(self.client.get('/api/history/').json()['history']), 1)
+        self.upload(sample_csv())
+        self.assertEqual(len(self.client.get('/api/history/').json()['history']), 2)
+
+
+@unittest.skipUnless(os.name == 'posix', "process liveness is only checked on POSIX")
+class RefinementJobTests(TestCase):
+    def setUp(self):
+        job_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(job_dir.cleanup)
+        override = self.settings(SKETCH_JOB_DIR=job_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.job = RefinementJob.create('fleet.csv', source=io.BytesIO(sample_csv().encode()))
+        self.job._save(state=RefinementJob.REFINING)
+
+    def test_job_of_a_live_process_keeps_refining(self):
+        self.assertEqual(RefinementJob.load(self.job.job_id).status()['state'], RefinementJob.REFINING)
+        self.assertTrue(os.path.exists(self.job.data_path))
+
+    def test_job_of_an_exited_process_is_failed(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        self.job._save(owner=dict(self.job.state['owner'], pid=exited.pid))
+        RefinementJob.purge_expired()
+        status = RefinementJob.load(self.job.job_id).status()
+        self.assertEqual(status['state'], RefinementJob.FAILED)
+        self.assertNotIn('owner', status)
+        self.assertFalse(os.path.exists(self.job.data_path))
+
+
+class SketchTests(TestCase):
+    def test_error_bounds_cover_the_mean_with_few_blocks(self):
+        rng = np.random.default_rng(0)
+        rows = rng.integers(900, 1100, 400).astype(float)
+        sums = rows * 50 + rng.normal(0, 2000, len(rows))
+        true_mean = sums.sum() / rows.sum()
+        covered = 0
+        for _ in range(1000):
+            blocks = rng.choice(len(rows), 3, replace=False)
+            mean, error = _ratio_estimate(sums[blocks], rows[blocks], 3 / len(rows))
+            covered += abs(mean - true_mean) <= error
+        # A normal critical value covers about 80% with 2 degrees of freedom
+        self.assertGreaterEqual(covered / 1000, 0.92)
+
+    def test_block_rows_match_the_parser_quarantine(self):
+        header = b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+        data = b"A,Pump,1,2,3\nB,,1,2,3\nC,Pump,inf,2,3\nD,Pump,abc,2,3\n,Pump,1,2,3\n"
+        self.assertEqual(list(_block_frame(header, data)[NAME_COL]), ['A'])
@@ -1,8 +1,19 @@
 
 from django.urls import path
-from .views import EquipmentSummaryAPI, HistoryAPI
+from .views import (EquipmentSummaryAPI, RefinementJobAPI, HistoryAPI, DatasetSummaryAPI, DatasetRowsAPI,
+                    CompareAPI, ChunkedUploadInitAPI, ChunkedUploadStatusAPI, ChunkedUploadChunkAPI,
+                    ChunkedUploadCommitAPI, metrics_view)
 
 urlpatterns = [
     path('upload/', EquipmentSummaryAPI.as_view(), name='equipment-upload'),
+    path('upload/jobs/<uuid:job_id>/', RefinementJobAPI.as_view(), name='upload-job'),
     path('history/', HistoryAPI.as_view(), name='equipment-history'),
+    path('datasets/<int:dataset_id>/', DatasetSummaryAPI.as_view(), name='dataset-summary'),
+    path('datasets/<int:dataset_id>/rows/', DatasetRowsAPI.as_view(), name='dataset-rows'),
+    path('uploads/', ChunkedUploadInitAPI.as_view(), name='chunked-upload-init'),
+    path('uploads/<uuid:upload_id>/', ChunkedUploadStatusAPI.as_view(), name='chunked-upload-status'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', ChunkedUploadChunkAPI.as_view(), name='chunked-upload-chunk'),
+    path('uploads/<uuid:upload_id>/commit/', ChunkedUploadCommitAPI.as_view(), name='chunked-upload-commit'),
+    path('compare/', CompareAPI.as_view(), name='equipment-compare'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
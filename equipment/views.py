@@ -3,9 +3,78 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
-import pandas as pd
-import json
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse
+import io
+import os
 from .models import EquipmentDataset
+from .analytics import compare_datasets
+from .columns import covers_records, load_columns, page_records, records_columns, write_columns
+from .parsing import QUARANTINE_PREVIEW, CSVFormatError
+from .ingest import HISTORY_LIMIT, EmptyDatasetError, prepare_csv, store_datasets
+from .cache import HISTORY_IDS_KEY, HISTORY_BODY_KEY, cached, cached_listing, store_many
+from .chunked import ChunkedUpload, ChunkError
+from .refinement import RefinementJob
+from .sketches import sketch_csv
+from .metrics import REGISTRY, stage
+
+def _source_size(source):
+    size = getattr(source, 'size', None)
+    if size is None:
+        try:
+            size = os.fstat(source.fileno()).st_size
+        except (AttributeError, OSError):
+            size = 0
+    return size
+
+def ingest_csv(source, filename):
+    """Parse, summarise and store one CSV; shared by direct and chunked uploads."""
+    try:
+        try:
+            summary, raw_data, quarantine, columns = prepare_csv(source, _source_size(source))
+        except EmptyDatasetError as e:
+            return Response({
+                "error": str(e),
+                "quarantinedCount": len(e.quarantine),
+                "quarantine": e.quarantine[:QUARANTINE_PREVIEW]
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except CSVFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        new_entry, = store_datasets([(filename, summary, raw_data, columns)])
+
+        return Response({
+            "id": new_entry.id,
+            "filename": filename,
+            "data": raw_data,
+            "summary": summary,
+            "quarantinedCount": len(quarantine),
+            "quarantine": quarantine[:QUARANTINE_PREVIEW]
+        }, status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def sketch_mode(request):
+    return (request.query_params.get('mode') or request.data.get('mode')) == 'sketch'
+
+def ingest_csv_sketch(job):
+    """Answer with sketch statistics within the time budget and refine to exact values in the background."""
+    try:
+        with stage('sketch'):
+            preliminary = sketch_csv(job.data_path, time_budget=settings.SKETCH_TIME_BUDGET_SECONDS,
+                                     block_bytes=settings.SKETCH_BLOCK_BYTES)
+    except CSVFormatError as e:
+        job.discard()
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        job.discard()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    job.start(preliminary)
+    return Response(job.status(), status=status.HTTP_202_ACCEPTED)
 
 class EquipmentSummaryAPI(APIView):
     parser_classes = (MultiPartParser, FormParser)
@@ -15,60 +84,259 @@ class EquipmentSummaryAPI(APIView):
         if not file_obj:
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Parse CSV with Pandas
-            df = pd.read_csv(file_obj)
-            
-            # Required columns validation
-            required_cols = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-            if not all(col in df.columns for col in required_cols):
-                return Response({
-                    "error": f"Invalid CSV format. Required columns: {', '.join(required_cols)}"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            # Perform Analytics
-            summary = {
-                "totalCount": int(df.shape[0]),
-                "avgFlowrate": round(float(df['Flowrate'].mean()), 2),
-                "avgPressure": round(float(df['Pressure'].mean()), 2),
-                "avgTemperature": round(float(df['Temperature'].mean()), 2),
-                "typeDistribution": df['Type'].value_counts().to_dict()
-            }
+        if sketch_mode(request):
+            if hasattr(file_obj, 'temporary_file_path'):
+                # Large uploads are already spooled to disk; move them rather than copy
+                job = RefinementJob.create(file_obj.name, source_path=file_obj.temporary_file_path())
+            else:
+                job = RefinementJob.create(file_obj.name, source=file_obj)
+            return ingest_csv_sketch(job)
+        return ingest_csv(file_obj, file_obj.name)
 
-            # Prepare data for storage
-            raw_data = df.to_dict('records')
+class RefinementJobAPI(APIView):
+    def get(self, request, job_id):
+        job = RefinementJob.load(str(job_id))
+        if job is None:
+            return Response({"error": "Unknown job"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job.status())
 
-            # Save to Database
-            new_entry = EquipmentDataset.objects.create(
-                filename=file_obj.name,
-                summary_json=summary,
-                raw_data_json=raw_data
-            )
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-            # Maintain history: Delete entries older than the last 5
-            ids_to_keep = EquipmentDataset.objects.order_by('-upload_date').values_list('id', flat=True)[:5]
-            EquipmentDataset.objects.exclude(id__in=list(ids_to_keep)).delete()
+def _json_bytes(payload):
+    return JSONRenderer().render(payload)
 
-            return Response({
-                "id": new_entry.id,
-                "filename": file_obj.name,
-                "data": raw_data,
-                "summary": summary
-            }, status=status.HTTP_201_CREATED)
+def _json_response(body, status_code=200):
+    return HttpResponse(body, status=status_code, content_type='application/json')
 
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+def registry_version():
+    """Fingerprint of the registry: ids are never reused, so any upload or prune changes it."""
+    stats = EquipmentDataset.objects.aggregate(last=Max('id'), count=Count('id'))
+    return stats['last'], stats['count']
+
+def live_dataset_ids():
+    """Ids currently in the registry, newest first; cached until the registry changes."""
+    return cached_listing(HISTORY_IDS_KEY, registry_version(), lambda: list(
+        EquipmentDataset.objects.values_list('id', flat=True)[:HISTORY_LIMIT]))
+
+def _dataset_columns(dataset_id):
+    """The dataset's columnar sidecar, or None if the dataset is gone."""
+    columns = load_columns(dataset_id)
+    if columns is None:
+        # Stored before sidecars existed: decode the rows once and keep the sidecar
+        raw_data = EquipmentDataset.objects.filter(id=dataset_id).values_list('raw_data_json', flat=True).first()
+        if raw_data is None:
+            return None
+        write_columns(dataset_id, records_columns(raw_data))
+        columns = load_columns(dataset_id)
+    return columns
 
 class HistoryAPI(APIView):
     def get(self, request):
-        datasets = EquipmentDataset.objects.all()[:5]
-        history = []
-        for ds in datasets:
-            history.append({
-                "id": ds.id,
-                "filename": ds.filename,
-                "timestamp": ds.upload_date,
-                "summary": ds.summary_json,
-                "data": ds.raw_data_json
-            })
-        return Response({"history": history})
+        def build():
+            datasets = EquipmentDataset.objects.all()[:HISTORY_LIMIT]
+            history = []
+            for ds in datasets:
+                history.append({
+                    "id": ds.id,
+                    "filename": ds.filename,
+                    "timestamp": ds.upload_date,
+                    "summary": ds.summary_json,
+                    "data": ds.raw_data_json
+                })
+            return _json_bytes({"history": history})
+
+        # Serialized once per registry change; polls cost one aggregate query
+        return _json_response(cached_listing(HISTORY_BODY_KEY, registry_version(), build))
+
+class DatasetSummaryAPI(APIView):
+    def get(self, request, dataset_id):
+        def build():
+            ds = EquipmentDataset.objects.filter(id=dataset_id).values('id', 'filename', 'upload_date', 'summary_json').first()
+            if ds is None:
+                return None
+            return {
+                "id": ds['id'],
+                "filename": ds['filename'],
+                "timestamp": ds['upload_date'],
+                "summary": ds['summary_json'],
+            }
+
+        if dataset_id not in live_dataset_ids():
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+        result = cached('summary', f'dataset:{dataset_id}:summary', build, [dataset_id])
+        if result is None:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
+
+class DatasetRowsAPI(APIView):
+    """Rows of one dataset in pages (`page` is 1-based), served as cached JSON bytes."""
+
+    # Pages serialized per miss, so a client walking the dataset mostly hits the cache
+    READ_AHEAD_PAGES = 8
+
+    def get(self, request, dataset_id):
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = int(request.query_params.get('pageSize', settings.DATASET_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "page and pageSize must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or not 1 <= page_size <= settings.DATASET_MAX_PAGE_SIZE:
+            return Response({"error": f"page must be >= 1 and pageSize between 1 and {settings.DATASET_MAX_PAGE_SIZE}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if dataset_id not in live_dataset_ids():
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        def page_key(n):
+            return f'dataset:{dataset_id}:rows:{page_size}:{n}'
+
+        def build():
+            columns = _dataset_columns(dataset_id)
+            if columns is None:
+                return None
+            if covers_records(columns):
+                # Only the requested pages are read from the memory-mapped arrays
+                total_rows = len(columns['name_keys'])
+                rows = lambda start, stop: page_records(columns, start, stop)
+            else:
+                # Extra CSV columns live only in raw_data_json
+                records = EquipmentDataset.objects.filter(id=dataset_id).values_list('raw_data_json', flat=True).first()
+                if records is None:
+                    return None
+                total_rows = len(records)
+                rows = lambda start, stop: records[start:stop]
+            total_pages = max(1, -(-total_rows // page_size))
+            if page > total_pages:
+                return None
+            pages = {}
+            for n in range(page, min(page + self.READ_AHEAD_PAGES, total_pages + 1)):
+                pages[page_key(n)] = _json_bytes({
+                    "id": dataset_id,
+                    "page": n,
+                    "pageSize": page_size,
+                    "totalRows": total_rows,
+                    "totalPages": total_pages,
+                    "rows": rows((n - 1) * page_size, n * page_size),
+                })
+            body = pages.pop(page_key(page))
+            store_many(pages, [dataset_id])
+            return body
+
+        body = cached('rows', page_key(page), build, [dataset_id])
+        if body is None:
+            return Response({"error": "Page out of range"}, status=status.HTTP_404_NOT_FOUND)
+        return _json_response(body)
+
+class CompareAPI(APIView):
+    def get(self, request):
+        raw_ids = request.query_params.get('ids', '')
+        try:
+            ids = sorted({int(i) for i in raw_ids.split(',') if i.strip()})
+            limit = int(request.query_params.get('limit', 100))
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of dataset ids"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) < 2:
+            return Response({"error": "Select at least two datasets to compare"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= settings.COMPARE_MAX_LIMIT:
+            return Response({"error": f"limit must be between 1 and {settings.COMPARE_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        missing = set(ids) - set(live_dataset_ids())
+        if missing:
+            return Response({"error": f"Unknown dataset ids: {', '.join(map(str, sorted(missing)))}"},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        def build():
+            datasets = list(EquipmentDataset.objects.filter(id__in=ids).order_by('upload_date')
+                            .values_list('id', 'filename', 'upload_date'))
+            if len(datasets) < len(ids):
+                return None  # pruned since live_dataset_ids() was read
+            snapshots = []
+            with stage('compare'):
+                for ds_id, filename, upload_date in datasets:
+                    columns = _dataset_columns(ds_id)
+                    if columns is None:
+                        return None
+                    snapshots.append((ds_id, filename, upload_date, columns))
+                return compare_datasets(snapshots, asset_limit=limit)
+
+        # Datasets never change after upload, so the id set fully determines the result
+        cache_key = f"compare:{'-'.join(map(str, ids))}:{limit}"
+        result = cached('compare', cache_key, build, ids)
+        if result is None:
+            return Response({"error": "Some datasets were removed from the registry"},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
+
+class ChunkedUploadInitAPI(APIView):
+    def post(self, request):
+        try:
+            upload = ChunkedUpload.create(
+                filename=str(request.data['filename']),
+                size=int(request.data['size']),
+                chunk_size=int(request.data['chunkSize']),
+                sha256=request.data.get('sha256')
+            )
+        except (KeyError, TypeError, ValueError):
+            return Response({"error": "filename, size and chunkSize are required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except ChunkError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(upload.status(), status=status.HTTP_201_CREATED)
+
+class ChunkedUploadStatusAPI(APIView):
+    def get(self, request, upload_id):
+        upload = ChunkedUpload.load(str(upload_id))
+        if upload is None:
+            return Response({"error": "Unknown upload"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(upload.status())
+
+    def delete(self, request, upload_id):
+        upload = ChunkedUpload.load(str(upload_id))
+        if upload is not None:
+            upload.discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ChunkedUploadChunkAPI(APIView):
+    def put(self, request, upload_id, index):
+        upload = ChunkedUpload.load(str(upload_id))
+        if upload is None:
+            return Response({"error": "Unknown upload"}, status=status.HTTP_404_NOT_FOUND)
+        checksum = request.headers.get('X-Chunk-Sha256')
+        if not checksum:
+            return Response({"error": "X-Chunk-Sha256 header is required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Read the raw body as a stream so large chunks never sit in memory
+        try:
+            upload.write_chunk(index, request.stream or io.BytesIO(), checksum)
+        except ChunkError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"index": index, "received": True})
+
+class ChunkedUploadCommitAPI(APIView):
+    def post(self, request, upload_id):
+        upload = ChunkedUpload.load(str(upload_id))
+        if upload is None:
+            return Response({"error": "Unknown upload"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            source = upload.open_committed()
+        except ChunkError as e:
+            return Response({"error": str(e), "missingChunks": upload.missing_chunks()},
+                            status=status.HTTP_409_CONFLICT)
+
+        if sketch_mode(request):
+            source.close()
+            job = RefinementJob.create(upload.manifest['filename'], source_path=upload.data_path)
+            upload.discard()
+            return ingest_csv_sketch(job)
+
+        with source:
+            response = ingest_csv(source, upload.manifest['filename'])
+        # Keep the bytes around after a server error so the commit can be retried
+        if response.status_code < 500:
+            upload.discard()
+        return response